@@ -321,17 +321,41 @@ class Ui_ElkOpticsAnalyzerMainWindow(object):
         self.actionManipulateField.setObjectName("actionManipulateField")
         self.actionCloseTab = QtWidgets.QAction(ElkOpticsAnalyzerMainWindow)
         self.actionCloseTab.setObjectName("actionCloseTab")
+        self.actionLoadVisibleRange = QtWidgets.QAction(
+            ElkOpticsAnalyzerMainWindow
+        )
+        self.actionLoadVisibleRange.setCheckable(True)
+        self.actionLoadVisibleRange.setObjectName("actionLoadVisibleRange")
+        self.actionExportTask = QtWidgets.QAction(ElkOpticsAnalyzerMainWindow)
+        self.actionExportTask.setObjectName("actionExportTask")
+        self.actionExportSession = QtWidgets.QAction(
+            ElkOpticsAnalyzerMainWindow
+        )
+        self.actionExportSession.setObjectName("actionExportSession")
+        self.actionImportSession = QtWidgets.QAction(
+            ElkOpticsAnalyzerMainWindow
+        )
+        self.actionImportSession.setObjectName("actionImportSession")
+        self.actionExportColumnar = QtWidgets.QAction(
+            ElkOpticsAnalyzerMainWindow
+        )
+        self.actionExportColumnar.setObjectName("actionExportColumnar")
         self.menuAdditionalData.addAction(self.actionReadAdditionalData)
         self.menuAdditionalData.addAction(self.actionRemoveADFromTab)
         self.menuAdditionalData.addAction(self.actionRemoveADFromTask)
         self.menuAdditionalData.addAction(self.actionRemoveAllAdditionalData)
         self.menuMenu.addAction(self.actionSetWorkingDir)
         self.menuMenu.addAction(self.actionReload)
+        self.menuMenu.addAction(self.actionLoadVisibleRange)
         self.menuMenu.addSeparator()
         self.menuMenu.addAction(self.menuAdditionalData.menuAction())
         self.menuMenu.addAction(self.actionBatchLoad)
         self.menuMenu.addSeparator()
         self.menuMenu.addAction(self.actionSaveTabAs)
+        self.menuMenu.addAction(self.actionExportTask)
+        self.menuMenu.addAction(self.actionExportSession)
+        self.menuMenu.addAction(self.actionExportColumnar)
+        self.menuMenu.addAction(self.actionImportSession)
         self.menuMenu.addAction(self.actionCloseTab)
         self.menuMenu.addSeparator()
         self.menuMenu.addAction(self.actionQuit)
@@ -744,6 +768,55 @@ class Ui_ElkOpticsAnalyzerMainWindow(object):
         self.actionCloseTab.setShortcut(
             _translate("ElkOpticsAnalyzerMainWindow", "Ctrl+W")
         )
+        self.actionLoadVisibleRange.setText(
+            _translate(
+                "ElkOpticsAnalyzerMainWindow", "Load &Visible Range Only"
+            )
+        )
+        self.actionLoadVisibleRange.setStatusTip(
+            _translate(
+                "ElkOpticsAnalyzerMainWindow",
+                "Keep only data within the plotted frequency range, re-read when range is widened...",
+            )
+        )
+        self.actionExportTask.setText(
+            _translate("ElkOpticsAnalyzerMainWindow", "E&xport Task...")
+        )
+        self.actionExportTask.setStatusTip(
+            _translate(
+                "ElkOpticsAnalyzerMainWindow",
+                "Export all tabs of current task to a single binary file...",
+            )
+        )
+        self.actionExportSession.setText(
+            _translate("ElkOpticsAnalyzerMainWindow", "Export Sess&ion...")
+        )
+        self.actionExportSession.setStatusTip(
+            _translate(
+                "ElkOpticsAnalyzerMainWindow",
+                "Export all tasks including converted and batch data to a single binary file...",
+            )
+        )
+        self.actionExportColumnar.setText(
+            _translate(
+                "ElkOpticsAnalyzerMainWindow", "Export Task as &Table..."
+            )
+        )
+        self.actionExportColumnar.setStatusTip(
+            _translate(
+                "ElkOpticsAnalyzerMainWindow",
+                "Export all tabs of current task to a single Arrow or Parquet table...",
+            )
+        )
+        self.actionImportSession.setText(
+            _translate("ElkOpticsAnalyzerMainWindow", "I&mport Session...")
+        )
+        self.actionImportSession.setStatusTip(
+            _translate(
+                "ElkOpticsAnalyzerMainWindow",
+                "Restore tasks from exported binary file...",
+            )
+        )
 
 
 class Ui_TensorElementsDialog(object):
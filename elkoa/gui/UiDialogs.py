@@ -24,7 +24,7 @@ import wrapt
 
 import elkoa.gui.UiDesigner as UiDesigner
 import elkoa.gui.FrameLayout as FrameLayout
-from elkoa.utils import dicts, elk
+from elkoa.utils import archive, dicts, elk
 
 
 @wrapt.decorator
@@ -137,9 +137,9 @@ class BatchLoadDialog(QtWidgets.QDialog, UiDesigner.Ui_BatchLoadDialog):
         # parse elk.in which should be equal up to a parameter for all
         # selected folders of parameter study
         if error is None:
-            self.elkInput = elk.ElkInput(path=self.folders[0])
+            self.elkInput = elk.getElkInput(path=self.folders[0])
             for f in self.folders:
-                if not os.path.isfile(os.path.join(f, "elk.in")):
+                if not archive.isfile(os.path.join(f, "elk.in")):
                     error = (
                         "File(s) elk.in and/or INFO.OUT could not be found in "
                         "of the selected Folders."
@@ -158,14 +158,28 @@ class BatchLoadDialog(QtWidgets.QDialog, UiDesigner.Ui_BatchLoadDialog):
                 )
 
     def selectFile(self):
-        """Opens dialog where user can select one Elk output file."""
+        """Opens dialog where user can select one Elk output file.
+
+        When an archive of a parameter study is selected instead, all of its
+        calculation folders are added to the folder list.
+        """
         self.file, _ = QtWidgets.QFileDialog.getOpenFileName(
             self,
             "Select the filename that you want to batch-open",
             self.cwd,
-            "Elk output files (*.out);;All files (*.*)",
+            "Elk output files (*.out *.out.gz *.out.bz2 *.out.xz);;"
+            "Archives ({});;"
+            "All files (*.*)".format(
+                " ".join("*" + ext for ext in archive.ARCHIVE_EXTENSIONS)
+            ),
             options=QtWidgets.QFileDialog.DontUseNativeDialog,
         )
+        if archive.isArchive(self.file):
+            folders = archive.findFolders(self.file)
+            print("[INFO] Found {} folders in archive".format(len(folders)))
+            self.listWidget.addItems(folders)
+            self.file = self.lineEdit.text()
+            return
         # split basename and path for later reuse
         self._folderDir = os.path.dirname(os.path.dirname(self.file))
         self.file = os.path.basename(self.file)
@@ -21,6 +21,8 @@ import copy
 import functools
 import os
 import sys
+import weakref
+from concurrent import futures
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import Qt
@@ -28,7 +30,22 @@ from PyQt5.QtCore import Qt
 import elkoa
 import elkoa.gui.UiDesigner as UiDesigner
 import elkoa.gui.UiDialogs as UiDialogs
-from elkoa.utils import convert, elk, dicts, misc, io, plot
+from elkoa.utils import (
+    archive,
+    cache,
+    columnar,
+    compact,
+    convert,
+    elk,
+    dicts,
+    grids,
+    misc,
+    io,
+    parallel,
+    plot,
+    session,
+    store,
+)
 
 import matplotlib as mpl
 import numpy as np
@@ -88,8 +105,10 @@ class TabData:
     """Stores content of Elk optical output files
 
     Attributes:
-        freqs: Frequencies in eV.
-        field: Tensor or scalar field with real and imaginary parts as ndarray.
+        freqs: Frequencies in eV, interned via grids.intern such that tabs
+            with identical frequencies share one read-only array.
+        field: Tensor or scalar field with real and imaginary parts as ndarray
+            or memory-mapped ndarray from store.FieldStore.
         label: Labeltext for plot from labelDict.
         filename: Name of file where data has been loaded from.
         notes: Space for additional data, e.g. batch load label.
@@ -119,6 +138,14 @@ class TabData:
         self.xshift = 0
         self.updateAttributes()
 
+    @property
+    def freqs(self):
+        return self._freqs
+
+    @freqs.setter
+    def freqs(self, freqs):
+        self._freqs = grids.intern(freqs)
+
     def updateAttributes(self):
         """Analyzes stored field data and sets some attributes accordingly"""
         # disable tab if field data is not present
@@ -153,6 +180,9 @@ class MainWindow(
             tabNameDict, fileNameDict, labelDict, readerDict, additionalData
         splitMode: Character indicating horizontal or vertical split mode.
         dpi: Pixel density to use in figures.
+        numWorkers: Number of threads used for reading Elk output files.
+        workingDir: Folder Elk data is read from, may be located inside an
+            archive, then the process works in the archive's folder.
         use_global_states: Bool, true if tensor element dialog should apply to
             all plots, false when apply only to current figure.
         data: Holds all optical data from Elk output files read during startup.
@@ -167,6 +197,12 @@ class MainWindow(
         elkInput: Class that holds all parameters read from elk.in located
             in current working directory.
         plotter: Class instance taking care of global plot settings.
+        dataCache: Persistent cache for parsed data or None if disabled.
+        fieldStore: Keeps large fields on disk as memory-mapped arrays.
+        sharedFields: Maps ids of read-only fields shared by io for files
+            with identical content to (weak reference, stored field).
+        loadedRange: Frequency window (wmin, wmax) in eV that Elk output data
+            has been restricted to or None if complete spectra are loaded.
     """
 
     # new signals - must be class members
@@ -181,6 +217,7 @@ class MainWindow(
         self.tabNameDict = copy.deepcopy(dicts.TAB_NAME_DICT)
         self.fileNameDict = dicts.FILE_NAME_DICT
         self.readerDict = dicts.READER_DICT
+        self.matrixDict = dicts.MATRIX_DICT
         self.labelDict = dicts.LABEL_DICT
         self.conversionDict = dicts.CONVERSION_DICT
         self.additionalData = copy.deepcopy(dicts.ADDITIONAL_DATA)
@@ -196,11 +233,16 @@ class MainWindow(
         # attributes with default values
         self.splitMode = "v"
         self.dpi = 100
+        self.numWorkers = 8
+        # batch loads of at least this many folders use worker processes
+        self.minProcessBatch = 32
         # NOTE: keep in sync with MainWindow.ui
         self.use_global_states = False
         self.additionalPlots = {"triggered": False, "tabID": [0]}
         self.globalStates = None
         self.currentTask = None
+        self.loadedRange = None
+        self.workingDir = os.getcwd()
         self._pytest = False
 
         # apply signal/slot settings
@@ -215,6 +257,11 @@ class MainWindow(
         self.printAbout()
         # set global plot options
         self.setMplOptions()
+        # keep parsed data in persistent cache for fast reloads
+        self.dataCache = cache.enable()
+        # keep large fields on disk instead of in memory
+        self.fieldStore = store.FieldStore()
+        self.sharedFields = {}
         # read Elk input file and INFO.OUT
         self.changeWorkingDirectory(path=cwd, update=True)
 
@@ -277,6 +324,7 @@ class MainWindow(
             lambda: self.changeWorkingDirectory(path=None, update=True)
         )
         self.actionReload.triggered.connect(self.reloadData)
+        self.actionLoadVisibleRange.triggered.connect(self.toggleVisibleRange)
         self.actionReadAdditionalData.triggered.connect(
             self.readAdditionalData
         )
@@ -291,6 +339,10 @@ class MainWindow(
         )
         self.actionBatchLoad.triggered.connect(self.batchLoad)
         self.actionSaveTabAs.triggered.connect(self.saveTab)
+        self.actionExportTask.triggered.connect(self.exportTask)
+        self.actionExportSession.triggered.connect(self.exportSession)
+        self.actionExportColumnar.triggered.connect(self.exportColumnar)
+        self.actionImportSession.triggered.connect(self.importSession)
         self.actionCloseTab.triggered.connect(
             lambda: self.closeTab(index=self.tabWidget.currentIndex())
         )
@@ -347,6 +399,8 @@ class MainWindow(
         self.tabNameDict = copy.deepcopy(dicts.TAB_NAME_DICT)
         self.data = {}
         self.figures = []
+        self.fieldStore.clear()
+        self.sharedFields = {}
         self.readAllData()
         # inform user
         self.statusbar.showMessage("Data loaded, ready to plot...", 0)
@@ -369,21 +423,43 @@ class MainWindow(
         # set min/max frequency on x-axis using elk.in data (default: minw=0)
         # NOTE: must stay here for initial load AND reload to work!
         self.plotter = plot.Plot(maxw=self.elkInput.maxw)
+        # optionally restrict data to visible range and keep plot in sync
+        wrange = self.getLoadRange()
+        if wrange is not None:
+            self.plotter.minw, self.plotter.maxw = wrange
+        self.loadedRange = wrange
         print("\n--- reading optics data ---\n")
+        # list folder once instead of probing every known output file; tasks
+        # without any output get no jobs and are removed from taskChooser
+        manifest = io.Manifest(self.workingDir)
+        # read files of all available tasks concurrently, collect results in
+        # order
+        jobs = {}
+        with futures.ThreadPoolExecutor(max_workers=self.numWorkers) as pool:
+            for task in self.fileNameDict:
+                jobs.update(self.submitReadJobs(pool, task, wrange, manifest))
         for task in self.fileNameDict:
             # prepare array holding new TabData instances for each tab of task
             self.data[task] = []
             for tabIdx, tab in enumerate(self.tabNameDict[task]):
-                reader = self.readerDict[task][tabIdx]
                 filename = self.fileNameDict[task][tabIdx]
                 tabName = self.tabNameDict[task][tabIdx]
                 label = self.labelDict[tabName]
                 try:
-                    freqs, field = reader(filename, self.elkInput.numfreqs)
-                # np.loadtxt() throws OSError when file cannot be found.
-                except (io.TensorNotFoundError, OSError):
+                    job, index = jobs[task, tabIdx]
+                    freqs, field = job.result()
+                    if index is not None:
+                        field = field[index]
+                    # part of matrix may be missing even if others are present
+                    if np.isnan(field).all():
+                        raise io.TensorNotFoundError(filename)
+                # file not available or loadData() throws OSError when file
+                # cannot be found.
+                except (KeyError, io.TensorNotFoundError, OSError):
                     # indicate missing field data with None
                     freqs, field = [None, None]
+                # keep only existing elements of incomplete tensors
+                field = self.storeField(field)
                 self.data[task].append(TabData(freqs, field, label, filename))
             # disable/mark combo box entry if no task data is present at all
             tabStates = [tab.enabled for tab in self.data[task]]
@@ -393,6 +469,122 @@ class MainWindow(
                 # remove unavailable tasks
                 self.taskChooser.removeItem(idx)
 
+    def submitReadJobs(self, pool, task, wrange, manifest):
+        """Submits reader jobs for all available tabs of task to pool.
+
+        Availability of output files is checked against manifest, readers use
+        it to skip missing tensor elements without accessing the disk.
+
+        Returns:
+            Dictionary mapping (task, tabIdx) to (future, index) where index
+            selects the tab data from the reader result, e.g. part of a
+            response matrix read only once for several tabs, or is None.
+        """
+        jobs = {}
+        # tabs sharing a response matrix get views of a single read
+        matrixJobs = {}
+        matrixDict = self.matrixDict.get(task, {})
+        for tabIdx, tab in enumerate(self.tabNameDict[task]):
+            reader = self.readerDict[task][tabIdx]
+            filename = self.fileNameDict[task][tabIdx]
+            if filename in matrixDict:
+                dummy, index = matrixDict[filename]
+                dummy = os.path.join(self.workingDir, dummy)
+                if dummy not in matrixJobs:
+                    matrixJobs[dummy] = None
+                    if manifest.hasOutput(dummy):
+                        matrixJobs[dummy] = pool.submit(
+                            io.readMatrix,
+                            dummy,
+                            self.elkInput.numfreqs,
+                            wrange=wrange,
+                            manifest=manifest,
+                        )
+                if matrixJobs[dummy] is not None:
+                    jobs[task, tabIdx] = (matrixJobs[dummy], index)
+                continue
+            filename = os.path.join(self.workingDir, filename)
+            if not manifest.hasOutput(filename):
+                continue
+            job = pool.submit(
+                reader,
+                filename,
+                self.elkInput.numfreqs,
+                wrange=wrange,
+                manifest=manifest,
+            )
+            jobs[task, tabIdx] = (job, None)
+        return jobs
+
+    def storeField(self, field):
+        """Compresses incomplete tensors and maps large fields to disk.
+
+        Fields read from files with identical content are shared read-only
+        by io.shared and processed only once here, such that all tabs showing
+        them keep sharing a single array.
+        """
+        isShared = isinstance(field, np.ndarray) and not field.flags.writeable
+        if isShared:
+            ref, stored = self.sharedFields.get(id(field), (None, None))
+            # ids may be reused after garbage collection
+            if ref is not None and ref() is field:
+                return stored
+        stored = self.fieldStore.put(compact.compress(field))
+        if isShared:
+            self.sharedFields[id(field)] = (weakref.ref(field), stored)
+        return stored
+
+    def getLoadRange(self):
+        """Returns visible range if data loading is restricted to it."""
+        if not self.actionLoadVisibleRange.isChecked():
+            return None
+        return (self.spinBoxMin.value(), self.spinBoxMax.value())
+
+    def rereadElkData(self):
+        """Reads Elk output data of all tabs again for current load range.
+
+        In contrast to reloadData, batch, converted and on-top data as well as
+        tab settings like x-shifts are kept. Converted fields keep the range
+        they have been created with, manipulations of Elk data are lost.
+        """
+        wrange = self.getLoadRange()
+        print("\n--- re-reading optics data ---\n")
+        manifest = io.Manifest(self.workingDir)
+        jobs = []
+        with futures.ThreadPoolExecutor(max_workers=self.numWorkers) as pool:
+            for task, filenames in self.fileNameDict.items():
+                for tabData in self.data.get(task, []):
+                    # skip e.g. converted data that has no file of its own
+                    if tabData.filename not in filenames:
+                        continue
+                    if not tabData.enabled:
+                        continue
+                    reader = self.readerDict[task][
+                        filenames.index(tabData.filename)
+                    ]
+                    job = pool.submit(
+                        reader,
+                        os.path.join(self.workingDir, tabData.filename),
+                        self.elkInput.numfreqs,
+                        wrange=wrange,
+                        manifest=manifest,
+                    )
+                    jobs.append((tabData, job))
+        for tabData, job in jobs:
+            try:
+                freqs, field = job.result()
+            except (io.TensorNotFoundError, OSError):
+                print("[WARNING] Could not re-read", tabData.filename)
+                continue
+            tabData.freqs = freqs
+            tabData.field = self.storeField(field)
+        self.loadedRange = wrange
+
+    def toggleVisibleRange(self):
+        """Restricts data to visible range or reads complete spectra again."""
+        self.rereadElkData()
+        self.updateWindow()
+
     @rejectOnStartScreen
     def updateWindow(self, newtask=False):
         """Redraws figure for currently chosen Elk task."""
@@ -448,8 +640,8 @@ class MainWindow(
         # NOTE: cannot use getCurrent() here!
         task = self.currentTask
         data = self.data[task][tabIdx]
-        # shift x-axis as set by user
-        freqs = data.freqs + data.xshift
+        # x-axis shift as set by user is applied lazily by plotter
+        freqs = data.freqs
         # apply correct tensor elements states acc. to user setting
         if self.use_global_states:
             states = self.globalStates
@@ -463,15 +655,27 @@ class MainWindow(
             ax1, ax2 = self.plotter.plotBatch(fig, batchData, style)
         elif data.isVector:
             ax1, ax2 = self.plotter.plotVector(
-                fig, freqs, data.field, states, data.label, style
+                fig,
+                freqs,
+                data.field,
+                states,
+                data.label,
+                style,
+                xshift=data.xshift,
             )
         elif data.isTensor:
             ax1, ax2 = self.plotter.plotTensor(
-                fig, freqs, data.field, states, data.label, style
+                fig,
+                freqs,
+                data.field,
+                states,
+                data.label,
+                style,
+                xshift=data.xshift,
             )
         else:
             ax1, ax2 = self.plotter.plotScalar(
-                fig, freqs, data.field, data.label, style
+                fig, freqs, data.field, data.label, style, xshift=data.xshift
             )
         # draw additional plots on top
         if self.actionShowAdditionalData.isChecked():
@@ -574,7 +778,7 @@ class MainWindow(
             self,
             "Select one or more files to add to the current plot",
             cwd,
-            "Data files (*.dat *.out *.mat);;All files (*.*)",
+            "Data files (*.dat *.out *.mat *.gz *.bz2 *.xz);;All files (*.*)",
             options=QtWidgets.QFileDialog.DontUseNativeDialog,
         )
         if len(files) == 0:
@@ -604,24 +808,56 @@ class MainWindow(
                 self, "[ERROR]", "Can't add more than 6 on-top plots."
             )
             return
+        onTop = self.additionalData[task][tabIdx]
         for fname in files:
             # extract filename from path
             basename = os.path.basename(fname)
             try:
                 freqs, field = io.readScalar(fname, hartree=hartree)
+                # remove extension --> (base, ext)
+                fields = [(os.path.splitext(basename)[0], field)]
             except io.InvalidDataFileError:
-                print(
-                    "[ERROR] Invalid format. Skipping file {}".format(basename)
-                )
-                continue
-            # remove extension --> (base, ext)
-            label = os.path.splitext(basename)[0]
-            # make label latex friendly by escaping underscores
-            label = misc.convertFileNameToLatex(label, unit=False)
-            td = TabData(freqs, field, label, basename)
-            self.additionalData[task][tabIdx].append(td)
+                # e.g. CSV or tables with several spectra side by side
+                try:
+                    freqs, fields = self.readColumnData(fname, hartree)
+                except ValueError as e:
+                    print("[ERROR] {} Skipping file {}".format(e, basename))
+                    continue
+            for label, field in fields:
+                if len(onTop) >= 6:
+                    print("[WARNING] Can't add more than 6 on-top plots.")
+                    break
+                # make label latex friendly by escaping underscores
+                label = misc.convertFileNameToLatex(label, unit=False)
+                onTop.append(TabData(freqs, field, label, basename))
         self.updateWindow()
 
+    def readColumnData(self, fname, hartree):
+        """Asks user which columns of a wide table to read as on-top data.
+
+        Returns:
+            Tuple[freqs, fields] as returned by io.readColumns, fields is
+            empty if the user cancelled.
+
+        Raises:
+            ValueError: Invalid column map or table data.
+        """
+        names, _, _ = io.readTableHeader(fname)
+        hint = ""
+        if names is not None:
+            hint = "\nColumns: " + ", ".join(names)
+        text, ok = QtWidgets.QInputDialog.getText(
+            self,
+            "Select columns of " + os.path.basename(fname),
+            "Frequency column; [label:] real[, imag]; ... "
+            "(indices from 0 or names)" + hint,
+            text="0; 1, 2",
+        )
+        if not ok:
+            return None, []
+        freqColumn, series = io.parseColumnMap(text)
+        return io.readColumns(fname, series, freqColumn, hartree)
+
     def removeAdditionalData(self, mode):
         """Removes all on-top plots from task/tab/everywhere."""
         task, tabIdx = self.getCurrent(["task", "tabIdx"])
@@ -655,17 +891,28 @@ class MainWindow(
             print("    {}".format(f))
         print()
 
+        # parse files of large studies in worker processes on all cores
+        fullPaths = [os.path.join(folder, filename) for folder in folders]
+        processes = None if len(folders) >= self.minProcessBatch else 1
+        loads = parallel.readFiles(
+            fullPaths,
+            io.readScalar,
+            processes=processes,
+            returnExceptions=True,
+            numFreqsTest=numfreqs,
+        )
         # load individual output files into new list
         batchData = []
-        for folder in folders:
-            fullPath = os.path.join(folder, filename)
+        for folder, fullPath, load in zip(folders, fullPaths, loads):
             shortPath = misc.shortenPath(fullPath, 3)
             ylabel = misc.convertFileNameToLatex(filename)
-            try:
-                freqs, field = io.readScalar(fullPath, numfreqs)
-            except OSError:
+            if isinstance(load, OSError):
                 print("[ERROR] File {} not found".format(shortPath))
                 return
+            elif isinstance(load, Exception):
+                raise load
+            freqs, field = load
+            field = self.storeField(field)
 
             try:
                 # convert e.g. [A, 0.5, 200] --> "A, 0.5, 200"
@@ -683,10 +930,7 @@ class MainWindow(
             batchData.append(
                 TabData(freqs, field, ylabel, shortPath, [parameter, plabel])
             )
-        # we need some unique string for each item --> |batch #N - parameter|
-        task = "batch #1"
-        while self.taskChooser.findText(task, Qt.MatchContains) != -1:
-            task = "batch #" + str(int(task.split("#")[1]) + 1)
+        task = self.newBatchTask()
         taskText = task + " - {}".format(parameter)
         # link batch data to corresponding batch "task" in data list
         self.data[task] = batchData
@@ -699,6 +943,168 @@ class MainWindow(
         self.statusbar.showMessage("Batch loading files...", 2000)
         self.taskChooser.setCurrentIndex(idx)
 
+    def newBatchTask(self):
+        """Returns unused task name for batch data, i.e. batch #N."""
+        # we need some unique string for each item --> |batch #N - parameter|
+        task = "batch #1"
+        while self.taskIndex(task) != -1:
+            task = "batch #" + str(int(task.split("#")[1]) + 1)
+        return task
+
+    def taskIndex(self, task):
+        """Returns index of task in taskChooser or -1 if not listed."""
+        for idx in range(1, self.taskChooser.count()):
+            text = self.taskChooser.itemText(idx)
+            if text.split("-")[0].strip() == task:
+                return idx
+        return -1
+
+    @rejectOnStartScreen
+    def exportTask(self):
+        """Exports all tabs of current task to a single binary file."""
+        self.exportTasks([self.currentTask])
+
+    def exportSession(self):
+        """Exports all tasks with data including converted and batch tabs."""
+        tasks = [
+            task
+            for task, tabs in self.data.items()
+            if any(tabData.enabled for tabData in tabs)
+        ]
+        self.exportTasks(tasks)
+
+    def exportTasks(self, tasks):
+        """Writes data of tasks into NPZ file chosen by user.
+
+        Arrays are stored in binary form together with tab names and TabData
+        metadata, see elkoa.utils.session, hence they can be restored via
+        importSession without parsing text files again.
+        """
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            "Export data to binary file",
+            os.getcwd(),
+            "NumPy archives (*.npz);;All files (*.*)",
+            options=QtWidgets.QFileDialog.DontUseNativeDialog,
+        )
+        if filename == "":
+            print("\n--- cancelled by user ---")
+            return
+        if not filename.endswith(".npz"):
+            filename += ".npz"
+        titles = {
+            task: self.taskChooser.itemText(self.taskIndex(task))
+            for task in tasks
+        }
+        try:
+            session.save(
+                filename,
+                {task: self.data[task] for task in tasks},
+                {task: self.tabNameDict[task] for task in tasks},
+                titles,
+            )
+        except OSError as e:
+            print("[ERROR] Could not export data:", e)
+            return
+        print("[INFO] {} task(s) exported to {}".format(len(tasks), filename))
+
+    @rejectOnStartScreen
+    def exportColumnar(self):
+        """Exports all tabs of current task, e.g. a batch, as one table.
+
+        Frequencies, tensor elements and batch parameters go into a single
+        Arrow or Parquet file, see elkoa.utils.columnar, for analysis with
+        other tools. The user chooses single or double precision.
+        """
+        filename, fileFilter = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            "Export task as columnar table",
+            os.getcwd(),
+            "Arrow IPC (*.arrow);;Parquet (*.parquet)",
+            options=QtWidgets.QFileDialog.DontUseNativeDialog,
+        )
+        if filename == "":
+            print("\n--- cancelled by user ---")
+            return
+        ext = ".parquet" if "parquet" in fileFilter else ".arrow"
+        if os.path.splitext(filename)[1] not in [".arrow", ".parquet"]:
+            filename += ext
+        dtype, ok = QtWidgets.QInputDialog.getItem(
+            self,
+            "Export task as columnar table",
+            "Precision of frequencies and field data:",
+            columnar.DTYPES,
+            editable=False,
+        )
+        if not ok:
+            print("\n--- cancelled by user ---")
+            return
+        try:
+            columnar.write(filename, self.data[self.currentTask], dtype)
+        except ImportError as e:
+            QtWidgets.QMessageBox.warning(self, "[ERROR]", str(e))
+            return
+        except OSError as e:
+            print("[ERROR] Could not export data:", e)
+            return
+        print("[INFO] Task exported as table to {}".format(filename))
+
+    def importSession(self):
+        """Restores tasks from file written by exportTask or exportSession.
+
+        Imported tasks replace data of the same Elk task, batch tasks are
+        added as new ones.
+        """
+        filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Select exported ElkOA data",
+            os.getcwd(),
+            "NumPy archives (*.npz);;All files (*.*)",
+            options=QtWidgets.QFileDialog.DontUseNativeDialog,
+        )
+        if filename == "":
+            print("\n--- cancelled by user ---")
+            return
+        try:
+            tasks, tabNames, titles = session.load(filename)
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.warning(self, "[ERROR]", str(e))
+            return
+        if not tasks:
+            return
+        for task, tabs in tasks.items():
+            names, title = tabNames[task], titles[task]
+            if task.startswith("batch"):
+                newTask = self.newBatchTask()
+                title = title.replace(task, newTask, 1)
+                task = newTask
+            self.data[task] = [self.restoreTabData(tab) for tab in tabs]
+            self.tabNameDict[task] = names
+            self.additionalData[task] = [[] for _ in names]
+            if self.taskIndex(task) == -1:
+                self.taskChooser.addItem(title)
+        print(
+            "[INFO] {} task(s) imported from {}".format(len(tasks), filename)
+        )
+        # show last imported task
+        idx = self.taskIndex(task)
+        if idx == self.taskChooser.currentIndex():
+            self.updateWindow(newtask=True)
+        else:
+            self.taskChooser.setCurrentIndex(idx)
+
+    def restoreTabData(self, tab):
+        """Creates TabData from a tab as returned by session.load."""
+        field = self.storeField(tab["field"])
+        tabData = TabData(
+            tab["freqs"], field, tab["label"], tab["filename"], tab["notes"]
+        )
+        tabData.isVector = bool(tab["isVector"])
+        tabData.xshift = tab["xshift"] or 0
+        if tab["states"] is not None:
+            tabData.states = tab["states"]
+        return tabData
+
     @rejectOnStartScreen
     def saveTab(self):
         """Saves data from current tab view without on-top add. data."""
@@ -722,18 +1128,15 @@ class MainWindow(
             elements = [
                 (i + 1) for i in range(3) if states[i * 4] == Qt.Checked
             ]
-            io.writeVector(
+            self.writeElementFiles(
+                io.writeVector,
                 filename,
-                data.freqs,
-                data.field,
-                elements=elements,
+                data,
+                elements,
                 threeColumn=threeColumn,
                 hartree=hartree,
                 prec=prec,
             )
-            for e in elements:
-                fname = filename.replace("_i", "_" + str(e))
-                print("[INFO] Tabdata saved as {}".format(fname))
         elif data.isTensor:
             # choose indices/elements to write to file from user selection
             default = [11, 12, 13, 21, 22, 23, 31, 32, 33]
@@ -741,18 +1144,15 @@ class MainWindow(
                 e for idx, e in enumerate(default) if states[idx] == Qt.Checked
             ]
             # save chosen data to files
-            io.writeTensor(
+            self.writeElementFiles(
+                io.writeTensor,
                 filename,
-                data.freqs,
-                data.field,
-                elements=elements,
+                data,
+                elements,
                 threeColumn=threeColumn,
                 hartree=hartree,
                 prec=prec,
             )
-            for e in elements:
-                fname = filename.replace("_ij", "_" + str(e))
-                print("[INFO] Tabdata saved as {}".format(fname))
         else:
             io.writeScalar(
                 filename,
@@ -764,6 +1164,32 @@ class MainWindow(
             )
             print("[INFO] Tabdata saved as {}".format(filename))
 
+    def writeElementFiles(self, writer, filename, data, elements, **kwargs):
+        """Writes vector or tensor elements concurrently, reports each file.
+
+        Args:
+            writer: Either io.writeVector or io.writeTensor.
+            filename: Dummy filename containing _i or _ij.
+            data: TabData to be saved.
+            elements: Elements to be written as expected by writer.
+            **kwargs: Format options passed to writer.
+        """
+        try:
+            saved = writer(
+                filename,
+                data.freqs,
+                data.field,
+                elements=elements,
+                workers=self.numWorkers,
+                **kwargs
+            )
+        except io.WriteError as e:
+            saved = e.written
+            for fname, error in e.errors.items():
+                print("[ERROR] Could not save {}: {}".format(fname, error))
+        for fname in saved:
+            print("[INFO] Tabdata saved as {}".format(fname))
+
     def closeTab(self, index):
         """Removes all data associated with the tab to be closed."""
         # should also work on start page (task=None), so don't use getCurrent()
@@ -895,6 +1321,7 @@ class MainWindow(
             label = self.labelDict[tabName]
             tabNameConv = tabName + "[c]"
             # create new TabData instance for new field and append to plot data
+            field = self.fieldStore.put(field)
             td = TabData(data.freqs, field, label, "[convert]", task)
             if "vector" in converterDict["opts"]:
                 td.isVector = True
@@ -935,6 +1362,12 @@ class MainWindow(
         data.xshift = dialog.xshift
         # manipulate field data
         if data.isTensor:
+            # compact fields can't be modified per frequency
+            if isinstance(data.field, compact.CompactField):
+                data.field = data.field.toArray()
+            # fields shared with other tabs are read-only
+            elif not data.field.flags.writeable:
+                data.field = np.array(data.field)
             # use x for frequencies b/c ne.evaluate will look for it
             for idx, x in enumerate(data.freqs):
                 # use y here b/c ne.evaluate will look for it
@@ -975,7 +1408,7 @@ class MainWindow(
     def parseElkFiles(self):
         """Wrapper that handles reading of Elk input files."""
         try:
-            elkInput = elk.ElkInput(verbose=True)
+            elkInput = elk.getElkInput(path=self.workingDir, verbose=True)
         except FileNotFoundError:
             QtWidgets.QMessageBox.about(
                 self,
@@ -987,7 +1420,11 @@ class MainWindow(
         return elkInput
 
     def changeWorkingDirectory(self, path=None, update=False):
-        """Updates current working dir to user choice and reads Elk input."""
+        """Updates current working dir to user choice and reads Elk input.
+
+        Folders inside archives, e.g. study.tar.gz/scan1, are browsed without
+        extraction, the process then works in the folder of the archive.
+        """
         from PyQt5.QtWidgets import QFileDialog
 
         if path is None:
@@ -998,7 +1435,14 @@ class MainWindow(
                 QFileDialog.ShowDirsOnly | QFileDialog.DontUseNativeDialog,
             )
         try:
-            os.chdir(path)
+            if archive.isMember(path):
+                if not archive.isdir(path):
+                    raise FileNotFoundError(path)
+                os.chdir(os.path.dirname(archive.splitPath(path)[0]))
+                self.workingDir = os.path.abspath(path)
+            else:
+                os.chdir(path)
+                self.workingDir = os.getcwd()
         except FileNotFoundError:
             # stops event loop (when called in while-loop, will hang there...)
             self.quitGui()
@@ -1052,6 +1496,11 @@ class MainWindow(
             # update plotter values
             self.plotter.minw = minw
             self.plotter.maxw = maxw
+            # loaded data does not cover widened range, read it on demand
+            if self.loadedRange is not None and (
+                minw < self.loadedRange[0] or maxw > self.loadedRange[1]
+            ):
+                self.rereadElkData()
             # redraw plots
             self.updateWindow()
 
@@ -1163,6 +1612,7 @@ class MainWindow(
         print("\n/-------------------------------------------\\")
         print("|            quitting application           |")
         print("\\-------------------------------------------/")
+        self.fieldStore.close()
         self.close()
 
 
@@ -17,4 +17,19 @@
 # You should have received a copy of the GNU General Public License
 # along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ["io", "elk", "misc", "plot", "convert"]
+__all__ = [
+    "io",
+    "elk",
+    "misc",
+    "plot",
+    "convert",
+    "cache",
+    "store",
+    "compact",
+    "grids",
+    "aio",
+    "parallel",
+    "archive",
+    "session",
+    "columnar",
+]
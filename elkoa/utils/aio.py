@@ -0,0 +1,151 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import functools
+
+from elkoa.utils import elk, io, misc
+
+# default number of files or folders read at the same time
+DEFAULT_CONCURRENCY = 8
+
+
+async def run(fun, *args, semaphore=None, executor=None, **kwargs):
+    """Runs blocking fun(*args, **kwargs) in executor without blocking loop.
+
+    Args:
+        fun: Blocking function, e.g. io.readScalar.
+        semaphore: Optional asyncio.Semaphore bounding the number of calls
+            running at the same time, e.g. shared by all reads of a study.
+        executor: concurrent.futures executor, defaults to the loop's
+            default thread pool.
+
+    Returns:
+        Return value of fun.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fun, *args, **kwargs)
+    if semaphore is None:
+        return await loop.run_in_executor(executor, call)
+    async with semaphore:
+        return await loop.run_in_executor(executor, call)
+
+
+async def readScalar(filename, *args, semaphore=None, executor=None, **kw):
+    """Async version of io.readScalar, see run for further arguments."""
+    return await run(
+        io.readScalar,
+        filename,
+        *args,
+        semaphore=semaphore,
+        executor=executor,
+        **kw
+    )
+
+
+async def readTensor(dummyName, *args, semaphore=None, executor=None, **kw):
+    """Async version of io.readTensor, see run for further arguments."""
+    return await run(
+        io.readTensor,
+        dummyName,
+        *args,
+        semaphore=semaphore,
+        executor=executor,
+        **kw
+    )
+
+
+async def readElkInput(path=None, semaphore=None, executor=None, **kw):
+    """Async version of elk.getElkInput, see run for further arguments."""
+    return await run(
+        elk.getElkInput, path, semaphore=semaphore, executor=executor, **kw
+    )
+
+
+async def asCompleted(
+    items,
+    load,
+    concurrency=DEFAULT_CONCURRENCY,
+    executor=None,
+    returnExceptions=False,
+):
+    """Loads all items concurrently and yields results as they complete.
+
+    A consumer can thus start converting or plotting the first folders of a
+    study while the remaining ones are still being read. At most concurrency
+    loads run at the same time.
+
+    Args:
+        items: Iterable of e.g. folders or filenames.
+        load: Blocking function called as load(item), e.g. a
+            functools.partial of io.readScalar.
+        concurrency: Maximum number of simultaneous loads.
+        executor: concurrent.futures executor, defaults to the loop's
+            default thread pool.
+        returnExceptions: If True, exceptions raised by load are yielded as
+            results instead of being raised, similar to asyncio.gather.
+
+    Yields:
+        Tuple[item, result] in order of completion.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def loadItem(item):
+        try:
+            result = await run(
+                load, item, semaphore=semaphore, executor=executor
+            )
+        except Exception as e:
+            if not returnExceptions:
+                raise
+            result = e
+        return item, result
+
+    tasks = [asyncio.ensure_future(loadItem(item)) for item in items]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        # e.g. consumer stopped early or a load failed
+        for task in tasks:
+            task.cancel()
+
+
+async def readFolders(folders, filename, reader=io.readScalar, **kwargs):
+    """Reads the same output file from many calculation folders.
+
+    Args:
+        folders: Iterable of folders, e.g. of a parameter study.
+        filename: Name of output file or _ij dummy name within each folder.
+        reader: Blocking reader, e.g. io.readScalar, io.readTensor or a
+            functools.partial of them with further reader options.
+        **kwargs: Passed to asCompleted.
+
+    Yields:
+        Tuple[folder, (freqs, field)] in order of completion.
+    """
+
+    def load(folder):
+        return reader(misc.joinPath(folder, filename))
+
+    async for folder, result in asCompleted(folders, load, **kwargs):
+        yield folder, result
+
+
+# EOF - aio.py
@@ -0,0 +1,386 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import io
+import os
+import posixpath
+import tarfile
+import threading
+import zipfile
+
+# file extensions of supported archives
+ARCHIVE_EXTENSIONS = (
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+    ".zip",
+)
+# magic bytes of gzip, bzip2 and xz compressed tar archives
+_TAR_COMPRESSION = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+# bytes of decompressed members of compressed tar archives kept per archive
+MEMBER_CACHE_SIZE = 2 ** 28
+
+# stat result of archive members, compatible with os.stat for our needs
+MemberStat = collections.namedtuple("MemberStat", ["st_size", "st_mtime_ns"])
+
+
+def isArchive(filename):
+    """Checks if filename has extension of supported archive formats."""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def splitPath(path):
+    """Splits path pointing inside an archive into archive and member name.
+
+    Paths like study.tar.gz/scan1/EPSILON_11.OUT are treated as if the
+    archive was an extracted folder of the same name.
+
+    Returns:
+        Tuple[archive, member] with absolute path of the archive file and
+        member name relative to archive root (empty for the archive root) or
+        None if path does not point inside an archive.
+    """
+    path = os.path.abspath(path)
+    # fast path for the usual plain files
+    if not any(ext in path.lower() for ext in ARCHIVE_EXTENSIONS):
+        return None
+    head, tail = path, []
+    while True:
+        if isArchive(head) and os.path.isfile(head):
+            return head, "/".join(reversed(tail))
+        head, name = os.path.split(head)
+        if not name:
+            return None
+        tail.append(name)
+
+
+def _normalize(name):
+    """Returns member name without leading ./ or / and trailing slashes."""
+    name = posixpath.normpath(name.lstrip("/"))
+    return "" if name == "." else name
+
+
+class _MemberReader(io.RawIOBase):
+    """Reads size bytes from offset of a file object, the member's data."""
+
+    def __init__(self, fileobj, offset, size):
+        self._fileobj = fileobj
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+        fileobj.seek(offset)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = min(max(offset, 0), self._size)
+        self._fileobj.seek(self._offset + self._pos)
+        return self._pos
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._size - self._pos)
+        if size <= 0:
+            return 0
+        data = self._fileobj.read(size)
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.close()
+        super().close()
+
+
+class ArchiveIndex:
+    """Index of all members of a tar or zip archive, built once.
+
+    Listing a tar archive requires reading all of its headers, i.e. the
+    entire file for compressed archives. The index keeps offsets and sizes
+    of all regular members, such that members of zip and uncompressed tar
+    archives can be streamed directly from the archive afterwards.
+
+    Each opened member gets its own file handle, hence members can be read
+    from several threads at once. Compressed tar archives cannot be accessed
+    at arbitrary offsets without decompressing everything before. When one
+    of their members is opened, the archive is decompressed up to the end of
+    the member's folder only and all files of this folder are kept in
+    memory, since calculations usually read several files of one folder.
+    At most MEMBER_CACHE_SIZE bytes are kept per archive, least recently
+    used first to go.
+
+    Attributes:
+        filename: Absolute path of archive file.
+        stamp: (size, mtime) of archive when the index was built.
+        members: Dictionary of member names and their TarInfo or ZipInfo.
+        folders: Dictionary of folder names and set of names of files in
+            them, including folders without explicit archive entry.
+    """
+
+    def __init__(self, filename):
+        self.filename = os.path.abspath(filename)
+        stat = os.stat(self.filename)
+        self.stamp = (stat.st_size, stat.st_mtime_ns)
+        self.members = {}
+        self.folders = collections.defaultdict(set)
+        self.folders[""]
+        self.isZip = zipfile.is_zipfile(self.filename)
+        self._zip = None
+        self._zipPid = None
+        # decompressed members of compressed tar archives and header offset
+        # of the last member of each folder, where decompression can stop
+        self.isCompressed = False
+        self._cache = collections.OrderedDict()
+        self._cacheSize = 0
+        self._folderEnds = {}
+        self._lock = threading.Lock()
+        if self.isZip:
+            with zipfile.ZipFile(self.filename) as zf:
+                infos = [(i.filename, i) for i in zf.infolist()]
+            infos = [(n, i) for n, i in infos if not i.is_dir()]
+        elif self._isCompressedTar():
+            self.isCompressed = True
+            # stream mode never seeks backwards in the compressed data
+            with tarfile.open(self.filename, "r|*") as tf:
+                infos = [(i.name, i) for i in tf if i.isfile()]
+            for name, info in infos:
+                folder = posixpath.dirname(_normalize(name))
+                self._folderEnds[folder] = info.offset
+        else:
+            with tarfile.open(self.filename) as tf:
+                infos = [(i.name, i) for i in tf if i.isfile()]
+        for name, info in infos:
+            name = _normalize(name)
+            self.members[name] = info
+            folder, basename = posixpath.split(name)
+            self.folders[folder].add(basename)
+            # register parent folders as well
+            while folder:
+                parent, basename = posixpath.split(folder)
+                self.folders[parent]
+                folder = parent
+        self.folders = dict(self.folders)
+
+    def _zipFile(self):
+        """Returns ZipFile of this process; handles must not be inherited."""
+        if self._zipPid != os.getpid():
+            self._zip = zipfile.ZipFile(self.filename)
+            self._zipPid = os.getpid()
+        return self._zip
+
+    def _isCompressedTar(self):
+        """Checks if archive is a gzip, bzip2 or xz compressed tar archive."""
+        with open(self.filename, "rb") as f:
+            return f.read(6).startswith(_TAR_COMPRESSION)
+
+    def _cacheMember(self, member, data):
+        """Keeps data of member, dropping least recently used ones."""
+        if len(data) > MEMBER_CACHE_SIZE:
+            return
+        self._cache[member] = data
+        self._cacheSize += len(data)
+        while self._cacheSize > MEMBER_CACHE_SIZE:
+            _, dropped = self._cache.popitem(last=False)
+            self._cacheSize -= len(dropped)
+
+    def _readCompressed(self, member):
+        """Returns data of member of compressed tar archive.
+
+        Decompresses the archive up to the last member in the folder of
+        member and caches all files of this folder on the way.
+        """
+        with self._lock:
+            data = self._cache.get(member)
+            if data is not None:
+                self._cache.move_to_end(member)
+                return data
+            folder = posixpath.dirname(member)
+            end = self._folderEnds[folder]
+            with tarfile.open(self.filename, "r|*") as tf:
+                for info in tf:
+                    if info.offset > end:
+                        break
+                    name = _normalize(info.name)
+                    if not info.isfile() or posixpath.dirname(name) != folder:
+                        continue
+                    content = tf.extractfile(info).read()
+                    if name == member:
+                        data = content
+                    elif name not in self._cache:
+                        self._cacheMember(name, content)
+            # requested member goes last, it is most recently used
+            self._cacheMember(member, data)
+            return data
+
+    def open(self, member):
+        """Opens member for reading as binary stream.
+
+        Raises:
+            FileNotFoundError: Member is not a regular file in the archive.
+        """
+        info = self.members.get(_normalize(member))
+        if info is None:
+            raise FileNotFoundError(
+                "No such file in {}: {}".format(self.filename, member)
+            )
+        if self.isZip:
+            return self._zipFile().open(info)
+        if self.isCompressed:
+            return io.BytesIO(self._readCompressed(_normalize(member)))
+        fileobj = open(self.filename, "rb")
+        raw = _MemberReader(fileobj, info.offset_data, info.size)
+        return io.BufferedReader(raw)
+
+
+# indexes of all archives accessed so far by absolute path; each archive has
+# its own lock, such that indexing one archive doesn't block the others
+_indexes = {}
+_locks = {}
+_lock = threading.Lock()
+
+
+def getIndex(filename):
+    """Returns ArchiveIndex of archive, rebuilt only if archive changed."""
+    filename = os.path.abspath(filename)
+    stat = os.stat(filename)
+    with _lock:
+        lock = _locks.setdefault(filename, threading.Lock())
+    with lock:
+        index = _indexes.get(filename)
+        if index is None or index.stamp != (stat.st_size, stat.st_mtime_ns):
+            index = _indexes[filename] = ArchiveIndex(filename)
+    return index
+
+
+def isMember(path):
+    """Checks if path points inside an archive."""
+    return splitPath(path) is not None
+
+
+def _locate(path):
+    """Returns (index, member) for paths inside archives or None."""
+    split = splitPath(path)
+    if split is None:
+        return None
+    archive, member = split
+    return getIndex(archive), _normalize(member)
+
+
+def isfile(path):
+    """Wrapper for os.path.isfile that handles paths inside archives."""
+    located = _locate(path)
+    if located is None:
+        return os.path.isfile(path)
+    index, member = located
+    return member in index.members
+
+
+def isdir(path):
+    """Wrapper for os.path.isdir treating archives as folders as well."""
+    located = _locate(path)
+    if located is None:
+        return os.path.isdir(path)
+    index, member = located
+    return member in index.folders
+
+
+def exists(path):
+    """Wrapper for os.path.exists that handles paths inside archives."""
+    return isfile(path) or isdir(path)
+
+
+def stat(path):
+    """Wrapper for os.stat that handles paths inside archives.
+
+    Members get their own size, but the archive's modification time, i.e.
+    they are considered modified whenever the archive is rewritten.
+    """
+    located = _locate(path)
+    if located is None:
+        return os.stat(path)
+    index, member = located
+    info = index.members.get(member)
+    if info is None:
+        raise FileNotFoundError("No such file: {}".format(path))
+    size = info.file_size if index.isZip else info.size
+    return MemberStat(size, index.stamp[1])
+
+
+def listFiles(folder):
+    """Returns names of all regular files in folder or archive folder."""
+    located = _locate(folder)
+    if located is None:
+        with os.scandir(folder) as it:
+            return [e.name for e in it if e.is_file()]
+    index, member = located
+    if member not in index.folders:
+        raise FileNotFoundError("No such folder: {}".format(folder))
+    return list(index.folders[member])
+
+
+def findFolders(filename, marker="elk.in"):
+    """Returns paths of all folders in archive containing a marker file.
+
+    E.g. all calculation folders of a parameter study archived as a whole.
+    """
+    index = getIndex(filename)
+    return sorted(
+        os.path.join(index.filename, *folder.split("/")).rstrip(os.sep)
+        for folder, names in index.folders.items()
+        if marker in names
+    )
+
+
+def openFile(path, mode="rb"):
+    """Opens regular file or archive member for reading.
+
+    Args:
+        path: Path of file, may point inside an archive.
+        mode: Either binary "rb" or text mode "r"/"rt".
+
+    Returns:
+        File object; archive members are streamed from the archive.
+    """
+    located = _locate(path)
+    if located is None:
+        return open(path, mode)
+    index, member = located
+    f = index.open(member)
+    if "b" not in mode:
+        f = io.TextIOWrapper(f)
+    return f
+
+
+# EOF - archive.py
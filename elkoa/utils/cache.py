@@ -0,0 +1,204 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from elkoa.utils import archive
+
+# default maximum size of the cache directory in MB
+DEFAULT_MAX_SIZE = 512
+
+
+def defaultCacheDir():
+    """Returns cache directory from $ELKOA_CACHE_DIR or XDG default."""
+    path = os.environ.get("ELKOA_CACHE_DIR")
+    if path is None:
+        xdg = os.environ.get(
+            "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+        )
+        path = os.path.join(xdg, "elkoa")
+    return path
+
+
+def fileStamp(filename, manifest=None):
+    """Returns absolute path, size and mtime identifying a file's state.
+
+    Missing files get a stamp as well, such that their later appearance
+    invalidates entries depending on them. Files known to be missing from an
+    io.Manifest of their folder are not looked up again. Archive members are
+    stamped with the archive's modification time.
+    """
+    path = os.path.abspath(filename)
+    if manifest is not None and manifest.isMissing(filename):
+        return (path, None, None)
+    try:
+        stat = archive.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, stat.st_size, stat.st_mtime_ns)
+
+
+class DataCache:
+    """Persistent binary cache for parsed Elk output data.
+
+    Parsed (freqs, field) arrays are stored as uncompressed npz files, one
+    per entry. Entries are keyed by absolute path, size and modification time
+    of all files they were read from plus the options passed to the reader,
+    hence rewriting a file invalidates its entries automatically. When the
+    total size exceeds maxSize, least recently used entries are removed.
+
+    Attributes:
+        path: Directory where cache entries are stored.
+        maxSize: Maximum total size of the cache directory in MB.
+    """
+
+    def __init__(self, path=None, maxSize=DEFAULT_MAX_SIZE):
+        self.path = path if path is not None else defaultCacheDir()
+        self.maxSize = maxSize
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, filenames, manifest=None, **options):
+        """Builds a unique key from file states and reader options."""
+        stamps = [fileStamp(f, manifest) for f in filenames]
+        return self.keyFromStamps(stamps, **options)
+
+    def keyFromStamps(self, stamps, **options):
+        """Builds key as key does from stamps returned by fileStamp."""
+        opts = sorted(options.items())
+        return hashlib.sha1(repr((stamps, opts)).encode()).hexdigest()
+
+    def entry(self, key):
+        """Returns the filename of the cache entry belonging to key."""
+        return os.path.join(self.path, key + ".npz")
+
+    def load(self, key):
+        """Returns cached (freqs, field) for key or None if not available."""
+        entry = self.entry(key)
+        try:
+            with np.load(entry) as npz:
+                freqs, field = npz["freqs"], npz["field"]
+            # mark as recently used
+            os.utime(entry)
+        except (OSError, KeyError, ValueError):
+            return None
+        return freqs, field
+
+    def store(self, key, freqs, field):
+        """Stores (freqs, field) for key and evicts old entries if needed."""
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, freqs=freqs, field=field)
+            # atomic, so concurrent readers never see partial entries
+            os.replace(tmp, self.entry(key))
+        except OSError as e:
+            print("[WARNING] Could not write cache entry:", e)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.evict()
+
+    def entries(self):
+        """Returns list of (mtime, size, path) for all cache entries."""
+        entries = []
+        with os.scandir(self.path) as it:
+            for e in it:
+                if not e.name.endswith(".npz"):
+                    continue
+                try:
+                    stat = e.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, e.path))
+        return entries
+
+    def size(self):
+        """Returns total size of all cache entries in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Removes least recently used entries until cache fits maxSize."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        limit = self.maxSize * 1024 ** 2
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # may have been removed concurrently
+                pass
+            total -= size
+
+    def clear(self):
+        """Removes all entries from cache."""
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# global cache instance used by the readers in elkoa.utils.io
+_cache = None
+
+
+def enable(path=None, maxSize=None):
+    """Enables global data cache, settings default to environment.
+
+    Args:
+        path: Cache directory, defaults to $ELKOA_CACHE_DIR or
+            $XDG_CACHE_HOME/elkoa.
+        maxSize: Size limit in MB, defaults to $ELKOA_CACHE_SIZE or
+            DEFAULT_MAX_SIZE. A value of 0 disables the cache.
+
+    Returns:
+        The new DataCache instance or None if caching is disabled.
+    """
+    global _cache
+    if maxSize is None:
+        maxSize = float(os.environ.get("ELKOA_CACHE_SIZE", DEFAULT_MAX_SIZE))
+    if maxSize <= 0:
+        _cache = None
+        return None
+    try:
+        _cache = DataCache(path, maxSize)
+    except OSError as e:
+        print("[WARNING] Data cache disabled:", e)
+        _cache = None
+    return _cache
+
+
+def disable():
+    """Disables global data cache without removing its entries."""
+    global _cache
+    _cache = None
+
+
+def getCache():
+    """Returns global DataCache instance or None if disabled."""
+    return _cache
+
+
+# EOF - cache.py
@@ -0,0 +1,176 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+import numpy as np
+
+# tensor elements in column order, scalar fields use plain real/imag columns
+ELEMENTS = ["", "11", "12", "13", "21", "22", "23", "31", "32", "33"]
+# supported floating point types of value columns
+DTYPES = ["float32", "float64"]
+
+
+def _pyarrow():
+    """Imports optional dependency pyarrow only when it is needed."""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "[ERROR] Columnar export requires pyarrow, please install it "
+            "via 'pip install pyarrow'."
+        ) from e
+    return pyarrow
+
+
+def _elements(field):
+    """Returns (element, data) for scalar fields and all present elements."""
+    if np.ndim(field) == 1:
+        return [("", field)]
+    elements = []
+    for i in range(3):
+        for j in range(3):
+            data = field[i, j]
+            if not np.isnan(data).all():
+                elements.append(("{}{}".format(i + 1, j + 1), data))
+    return elements
+
+
+def _columnName(part, element):
+    """Returns e.g. real_11 or just real for scalar fields."""
+    return part + "_" + element if element else part
+
+
+def _batchParameter(tab):
+    """Returns (parameter, value) of batch tabs, see MainWindow.batchLoad."""
+    notes = getattr(tab, "notes", None)
+    if isinstance(notes, (list, tuple)) and len(notes) == 2:
+        return str(notes[0]), str(notes[1])
+    return None, None
+
+
+def _categories(pa, strings, rows):
+    """Creates dictionary-encoded column repeating strings per tab."""
+    dictionary, indices = np.unique(
+        ["" if s is None else s for s in strings], return_inverse=True
+    )
+    return pa.DictionaryArray.from_arrays(
+        pa.array(indices[rows].astype(np.int32)), pa.array(dictionary)
+    )
+
+
+def toTable(tabs, dtype="float32"):
+    """Combines fields of several tabs into a single columnar table.
+
+    The table has one row per tab and frequency. String columns tab (index),
+    label, filename, parameter and value (batch parameters, see
+    MainWindow.batchLoad) are dictionary-encoded, i.e. stored once per tab.
+    Field data goes to columns real/imag for scalar fields and real_ij and
+    imag_ij for tensor elements, elements not present in a tab are NaN.
+
+    Args:
+        tabs: List of objects with freqs, field, label, filename and notes
+            like TabData; tabs without field are skipped.
+        dtype: Either "float32" or "float64" for frequency and field data.
+
+    Returns:
+        pyarrow.Table with columns as described above.
+
+    Raises:
+        ImportError: pyarrow is not installed.
+        ValueError: Unsupported dtype.
+    """
+    pa = _pyarrow()
+    if np.dtype(dtype).name not in DTYPES:
+        raise ValueError("[ERROR] dtype must be one of {}".format(DTYPES))
+    dtype = np.dtype(dtype)
+    tabs = [tab for tab in tabs if tab.field is not None]
+    elements = [_elements(tab.field) for tab in tabs]
+    present = {e for tabElements in elements for e, _ in tabElements}
+    lengths = [len(tab.freqs) for tab in tabs]
+    offsets = np.concatenate([[0], np.cumsum(lengths, dtype=int)])
+    total = int(offsets[-1])
+    rows = np.repeat(np.arange(len(tabs)), lengths)
+    freqs = np.empty(total, dtype)
+    columns = {}
+    for e in ELEMENTS:
+        if e in present:
+            for part in ["real", "imag"]:
+                columns[_columnName(part, e)] = np.full(total, np.nan, dtype)
+    for tab, tabElements, start, stop in zip(
+        tabs, elements, offsets, offsets[1:]
+    ):
+        freqs[start:stop] = tab.freqs
+        for e, data in tabElements:
+            columns[_columnName("real", e)][start:stop] = data.real
+            columns[_columnName("imag", e)][start:stop] = data.imag
+    parameters = [_batchParameter(tab) for tab in tabs]
+    table = {
+        "tab": pa.array(rows.astype(np.int32)),
+        "label": _categories(pa, [t.label for t in tabs], rows),
+        "filename": _categories(pa, [t.filename for t in tabs], rows),
+        "parameter": _categories(pa, [p for p, _ in parameters], rows),
+        "value": _categories(pa, [v for _, v in parameters], rows),
+        "frequency": pa.array(freqs),
+    }
+    for name, data in columns.items():
+        table[name] = pa.array(data)
+    return pa.table(table)
+
+
+def write(filename, tabs, dtype="float32"):
+    """Writes fields of several tabs into one columnar file.
+
+    Files ending on .parquet are written as Parquet, all others as
+    uncompressed Arrow IPC (Feather v2) files, which can be memory-mapped by
+    readers, see read.
+
+    Args:
+        filename: Output filename, e.g. study.arrow or study.parquet.
+        tabs: List of objects like TabData, see toTable.
+        dtype: Either "float32" or "float64" for frequency and field data.
+
+    Raises:
+        ImportError: pyarrow is not installed.
+    """
+    pa = _pyarrow()
+    table = toTable(tabs, dtype)
+    if os.path.splitext(filename)[1] == ".parquet":
+        pa.parquet.write_table(table, filename)
+        return
+    with pa.OSFile(filename, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read(filename):
+    """Reads table written by write, Arrow IPC files are memory-mapped.
+
+    Raises:
+        ImportError: pyarrow is not installed.
+    """
+    pa = _pyarrow()
+    if os.path.splitext(filename)[1] == ".parquet":
+        return pa.parquet.read_table(filename)
+    with pa.memory_map(filename) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+# EOF - columnar.py
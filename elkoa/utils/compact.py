@@ -0,0 +1,215 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+import numbers
+
+import numpy as np
+
+# order of the 6 unique elements of symmetric tensors: 11, 12, 13, 22, 23, 33
+SYMMETRIC_ELEMENTS = [(0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2)]
+
+
+class CompactField:
+    """Tensor field storing only elements that actually exist.
+
+    Many fields only have a few meaningful elements, e.g. vector fields like
+    polarization vectors on the diagonal or tensors with missing element
+    files. Instead of padding a (3, 3, N) array with NaN, only the existing
+    elements are kept in a (num_elements, N) array. Missing elements read as
+    NaN. Indexing single elements like field[i, j] or field[i, j, window]
+    returns views of the stored data, any other access and numpy functions
+    work on the full (3, 3, N) array created on demand via np.asarray.
+
+    Attributes:
+        elements: Tuple of (i, j) indices (counting from 0) of stored
+            elements; for symmetric fields only the upper triangle.
+        data: Array of shape (len(elements), N) holding the element data.
+        kind: One of "diagonal", "symmetric" or "sparse". Symmetric fields
+            return the same data for (i, j) and (j, i).
+    """
+
+    def __init__(self, elements, data, kind="sparse"):
+        if kind not in ["diagonal", "symmetric", "sparse"]:
+            raise ValueError("[ERROR] Unknown field kind: {}".format(kind))
+        self.elements = tuple((int(i), int(j)) for i, j in elements)
+        self.data = np.asanyarray(data)
+        if self.data.ndim != 2 or len(self.data) != len(self.elements):
+            raise ValueError(
+                "[ERROR] data must have shape (num_elements, num_freqs)!"
+            )
+        self.kind = kind
+        self._rows = {}
+        for row, (i, j) in enumerate(self.elements):
+            self._rows[i, j] = row
+            if kind == "symmetric":
+                self._rows[j, i] = row
+
+    @classmethod
+    def diagonal(cls, data):
+        """Creates field from up to 3 diagonal elements, e.g. a vector."""
+        return cls([(i, i) for i in range(len(data))], data, "diagonal")
+
+    @classmethod
+    def symmetric(cls, data):
+        """Creates field from 6 unique elements, see SYMMETRIC_ELEMENTS."""
+        return cls(SYMMETRIC_ELEMENTS, data, "symmetric")
+
+    @classmethod
+    def fromArray(cls, ten):
+        """Creates compact field from (3, 3, N) array dropping NaN elements.
+
+        Fields with only diagonal elements become diagonal ones, complete and
+        exactly symmetric fields symmetric ones, all others sparse ones.
+        """
+        ten = np.asarray(ten)
+        present = _presentElements(ten)
+        return _fromElements(ten, present, _isSymmetric(ten, present))
+
+    @property
+    def shape(self):
+        return (3, 3, self.data.shape[1])
+
+    @property
+    def ndim(self):
+        return 3
+
+    @property
+    def size(self):
+        return 9 * self.data.shape[1]
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def __len__(self):
+        return 3
+
+    def __repr__(self):
+        return "CompactField(kind={}, elements={}, shape={})".format(
+            self.kind, self.elements, self.shape
+        )
+
+    def _missing(self):
+        """Returns NaN array representing a missing element."""
+        nan = complex(np.nan, np.nan) if self.dtype.kind == "c" else np.nan
+        return np.full(self.shape[2], nan, dtype=self.dtype)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        # fast path for single elements, e.g. field[i, j] or field[i, j, w]
+        if len(key) >= 2 and all(
+            isinstance(k, numbers.Integral) for k in key[:2]
+        ):
+            i, j = key[0], key[1]
+            if not (-3 <= i < 3 and -3 <= j < 3):
+                raise IndexError("[ERROR] Index out of range for 3x3 field.")
+            row = self._rows.get((i % 3, j % 3))
+            element = self._missing() if row is None else self.data[row]
+            return element[key[2:]]
+        return self.toArray()[key]
+
+    def toArray(self):
+        """Returns field as (3, 3, N) array with missing elements as NaN."""
+        ten = np.empty(self.shape, dtype=self.dtype)
+        ten[...] = self._missing()
+        for (i, j), row in self._rows.items():
+            ten[i, j] = self.data[row]
+        return ten
+
+    def __array__(self, dtype=None, copy=None):
+        ten = self.toArray()
+        return ten if dtype is None else ten.astype(dtype)
+
+    def copy(self):
+        """Returns a compact field with a copy of the data."""
+        return CompactField(self.elements, self.data.copy(), self.kind)
+
+
+def _presentElements(ten):
+    """Returns (i, j) of all elements of (3, 3, N) array that are not NaN."""
+    present = []
+    for i in range(3):
+        for j in range(3):
+            element = ten[i, j]
+            # checking the first value avoids temporaries for typical data
+            if element.size and not np.isnan(element[0]):
+                present.append((i, j))
+            elif not np.isnan(element).all():
+                present.append((i, j))
+    return present
+
+
+def _isSymmetric(ten, present):
+    """Checks if all 9 elements are present and array is exactly symmetric.
+
+    Compares one pair of off-diagonal elements after another and a short
+    prefix first, such that non-symmetric tensors are rejected early.
+    """
+    if len(present) != 9:
+        return False
+    for i, j in [(0, 1), (0, 2), (1, 2)]:
+        a, b = ten[i, j], ten[j, i]
+        if not np.array_equal(a[:16], b[:16], equal_nan=True):
+            return False
+        if not np.array_equal(a, b, equal_nan=True):
+            return False
+    return True
+
+
+def _fromElements(ten, present, symmetric):
+    """Creates CompactField from present elements of (3, 3, N) array."""
+    if present and all(i == j for i, j in present):
+        rows, cols = zip(*present)
+        return CompactField(present, ten[rows, cols], "diagonal")
+    if symmetric:
+        rows, cols = zip(*SYMMETRIC_ELEMENTS)
+        return CompactField(SYMMETRIC_ELEMENTS, ten[rows, cols], "symmetric")
+    rows, cols = zip(*present) if present else ((), ())
+    return CompactField(present, ten[list(rows), list(cols)], "sparse")
+
+
+def compress(field):
+    """Returns compact version of field if this saves memory, else field.
+
+    Scalar fields and tensors without missing or symmetric elements are
+    returned unchanged.
+    """
+    if isinstance(field, CompactField) or field is None:
+        return field
+    if np.ndim(field) != 3 or np.shape(field)[:2] != (3, 3):
+        return field
+    ten = np.asarray(field)
+    present = _presentElements(ten)
+    symmetric = _isSymmetric(ten, present)
+    # complete tensors only become smaller if they are symmetric, decide
+    # before copying any elements
+    if len(present) == 9 and not symmetric:
+        return field
+    compact = _fromElements(ten, present, symmetric)
+    # keep read-only fields, e.g. shared ones, read-only
+    compact.data.flags.writeable = ten.flags.writeable
+    return compact
+
+
+# EOF - compact.py
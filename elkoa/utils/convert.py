@@ -20,7 +20,7 @@
 import numpy as np
 import wrapt
 
-from elkoa.utils import misc
+from elkoa.utils import compact, misc
 
 # let numpy raise proper errors instead of just printing text to terminal
 np.seterr(all="raise")
@@ -42,8 +42,10 @@ np.seterr(all="raise")
 def requires(lst):
     @wrapt.decorator
     def wrapper(converter, instance, args, kwargs):
-        # convention: args[0] --> field
-        field = args[0]
+        # convention: args[0] --> field; use plain ndarray view for mapped
+        # fields, such that results are created in memory, not as np.memmap
+        field = np.asarray(args[0])
+        args = (field,) + tuple(args[1:])
         if "nzq" in lst and (instance._q_frac == [0, 0, 0]).all():
             raise ValueError(
                 "q-vector may not be (0,0,0) for this conversion!"
@@ -333,6 +335,36 @@ class Converter:
         """Translates string to converter function and returns fun. pointer."""
         return getattr(self, name)
 
+    def convertChunks(self, name, chunks):
+        """Applies converter to fields given as chunks, e.g. by io.iterTensor.
+
+        Frequencies are temporarily set to those of each chunk, such that
+        spectra larger than memory can be converted piece by piece. Only
+        converters acting on each frequency independently are supported, the
+        refractive index converters use random transverse basis vectors and
+        sort n1/n2 by the first frequency, which would differ across chunks.
+
+        Args:
+            name: Name of converter function as used in getConverter.
+            chunks: Iterable of (freqs, field) tuples.
+
+        Yields:
+            Tuple[freqs, output] for each chunk.
+        """
+        if name.startswith("eps_to_refInd"):
+            raise ValueError(
+                "[ERROR] {} can't be applied chunk-wise!".format(name)
+            )
+        convertFunction = self.getConverter(name)
+        freqs = self.freqs
+        try:
+            for chunkFreqs, field in chunks:
+                self.freqs = chunkFreqs
+                yield chunkFreqs, convertFunction(field)
+        finally:
+            # restore full frequency grid
+            self.freqs = freqs
+
     @requires(["basis"])
     def cartToFrac(self, ten):
         tenFrac = np.empty_like(ten)
@@ -458,30 +490,18 @@ class Converter:
             # build longitudinal part as n^2 * inv(eps) . e_T - e_T
             eL[0, :, iw] = pv[0, :, iw] - eT1
             eL[1, :, iw] = pv[1, :, iw] - eT2
-        # combine to proper tensor data objects and disable remaining
-        # "tensor elements" for GUI
-        refInd = np.empty_like(eps)
-        polv1 = np.empty_like(eps)
-        polv2 = np.empty_like(eps)
-        eL1 = np.empty_like(eps)
-        eL2 = np.empty_like(eps)
-        # first entirely fill with NaN
-        for arr in [refInd, polv1, polv2, eL1, eL2]:
-            arr.fill(np.nan)
-        # fill diagonal elements with vector components
-        for i in range(3):
-            polv1[i, i, :] = pv[0, i, :]
-            polv2[i, i, :] = pv[1, i, :]
-            eL1[i, i, :] = eL[0, i, :]
-            eL2[i, i, :] = eL[1, i, :]
         # make sure that order of n1/n2 is identical for each run
         if n1[0] < n2[0]:
             n1, n2 = misc.swapArrays(n1, n2)
-            polv1, polv2 = misc.swapArrays(polv1, polv2)
-            eL1, eL2 = misc.swapArrays(eL1, eL2)
-        # assign correct refractive index to element 1 and 2
-        refInd[0, 0, :] = n1
-        refInd[1, 1, :] = n2
+            pv[[0, 1]] = pv[[1, 0]]
+            eL[[0, 1]] = eL[[1, 0]]
+        # combine to compact vector fields that behave like tensors with only
+        # diagonal elements for GUI, remaining elements read as NaN
+        refInd = compact.CompactField.diagonal([n1, n2])
+        polv1 = compact.CompactField.diagonal(pv[0])
+        polv2 = compact.CompactField.diagonal(pv[1])
+        eL1 = compact.CompactField.diagonal(eL[0])
+        eL2 = compact.CompactField.diagonal(eL[1])
         if returnPolVec:
             # return multiple fields as tuple
             return refInd, polv1, eL1, polv2, eL2
@@ -24,8 +24,8 @@ FILE_NAME_DICT = {
     "187": ["EPSILON_BSE_ij.OUT"],
     "320/v4": ["EPSILON_TDDFT.OUT", "EELS_TDDFT.OUT"],
     "320/v5": ["EPSILON_TDDFT_ij.OUT", "EPSINV_TDDFT_ij.OUT"],
-    # 330 is 4x4 CHI/CHI0 matrix but currently not supported; we restrict to
-    # density response (CHI_00.OUT) and magnetization response (CHI_ij.OUT)
+    # 330 is 4x4 CHI/CHI0 matrix; tabs show density response (CHI_00.OUT) and
+    # magnetization response (CHI_ij.OUT), see MATRIX_DICT for full matrix
     "330": [
         "CHI0_00.OUT",
         "CHI_00.OUT",
@@ -52,6 +52,17 @@ READER_DICT = {
     "330": [io.readScalar] * 4 + [io.readTensor] * 2,
 }
 
+# tabs whose data are parts of a response matrix, i.e. filename -> (dummy name
+# of full matrix read via io.readMatrix, index of tab data within matrix)
+MATRIX_DICT = {
+    "330": {
+        "CHI0_00.OUT": ("CHI0_ij.OUT", (0, 0)),
+        "CHI_00.OUT": ("CHI_ij.OUT", (0, 0)),
+        "CHI0_ij.OUT": ("CHI0_ij.OUT", (slice(1, 4), slice(1, 4))),
+        "CHI_ij.OUT": ("CHI_ij.OUT", (slice(1, 4), slice(1, 4))),
+    },
+}
+
 TAB_NAME_DICT = {
     "121": ["epsTen", "sigTen"],
     "187": ["epsTen"],
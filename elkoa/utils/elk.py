@@ -20,56 +20,133 @@
 import numpy as np
 from numpy import linalg
 import os
+import re
+import threading
 
-from elkoa.utils import misc
+from elkoa.utils import archive, misc
+
+# numbers in elk.in, incl. Fortran double precision exponents like 1.0d-3
+_INT_PATTERN = re.compile(r"[+-]?\d+")
+_FLOAT_PATTERN = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eEdD][+-]?\d+)?")
+# block names; values that are strings are quoted as in 'Si.in'
+_NAME_PATTERN = re.compile(r"[A-Za-z]\w*")
+# short Fortran logicals, which look like block names otherwise
+_LOGICALS = {"T", "F", "t", "f"}
+# parsed elk.in files by absolute path: ((mtime, size), blocks)
+_parsed = {}
+# ElkInput instances by absolute folder, see getElkInput
+_instances = {}
+_instancesLock = threading.Lock()
+
+
+def _convertToken(token):
+    """Converts logicals and numbers of elk.in, keeps all others as str."""
+    lower = token.lower()
+    if lower == ".true.":
+        return True
+    elif lower == ".false.":
+        return False
+    elif _INT_PATTERN.fullmatch(token):
+        return int(token)
+    elif _FLOAT_PATTERN.fullmatch(token):
+        return float(lower.replace("d", "e"))
+    return token
+
+
+def _tokenize(line):
+    """Splits line of elk.in into values, dropping trailing comments."""
+    tokens = []
+    for token in line.split():
+        # comments as in "100 100 0 : nwplot" or Fortran style "! ..."
+        if token.startswith((":", "!")):
+            break
+        tokens.append(token)
+    return tokens
+
+
+def _parseBlocks(lines):
+    """Tokenizes all blocks of elk.in in a single pass.
+
+    As in Elk, a block starts with a line beginning with its name and ends at
+    the next blank line or the next block name, i.e. blocks need not be
+    separated by blank lines. Lines holding only comments are skipped, the
+    last of repeated blocks wins.
+    """
+    raw = {}
+    name = None
+    for line in lines:
+        tokens = _tokenize(line)
+        if not tokens:
+            if not line.strip():
+                name = None
+            continue
+        first = tokens[0]
+        isName = _NAME_PATTERN.fullmatch(first) and first not in _LOGICALS
+        if name is None or isName:
+            name = first
+            raw[name] = []
+        else:
+            raw[name].extend(_convertToken(t) for t in tokens)
+    # unwrap single values
+    return {k: v[0] if len(v) == 1 else v for k, v in raw.items()}
+
+
+def _elkInputBlocks(path):
+    """Returns cached blocks of path/elk.in, parsed again once it changed."""
+    inputFile = os.path.abspath(misc.joinPath(path, "elk.in"))
+    stat = archive.stat(inputFile)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _parsed.get(inputFile)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with archive.openFile(inputFile, "r") as f:
+        blocks = _parseBlocks(f)
+    _parsed[inputFile] = (stamp, blocks)
+    return blocks
+
+
+def parseElkInput(path=None):
+    """Parses all blocks of path/elk.in into a dictionary.
+
+    The file is parsed only once as long as its modification time and size
+    stay the same. Values are converted as in readElkInputParameter.
+
+    Returns:
+        Dictionary mapping block names to their values.
+
+    Raises:
+        FileNotFoundError: path/elk.in does not exist.
+    """
+    blocks = _elkInputBlocks(path)
+    return {k: list(v) if type(v) is list else v for k, v in blocks.items()}
 
 
 def readElkInputParameter(parameter, path=None):
-    """Reads a specific input parameter from path/elk.in."""
-    inputFile = misc.joinPath(path, "elk.in")
-    with open(inputFile, "r") as f:
-        p = None
-        for line in f:
-            if line.startswith(parameter):
-                p = []
-                while True:
-                    split = next(f).split()
-                    # stop when parameter block ends
-                    if split == []:
-                        break
-                    # remove comments from lines
-                    elif ":" in split:
-                        idx = split.index(":")
-                        split = split[:idx]
-                    p.extend(split)
-    # catch non-existing p as NameError here b/c enumerate will throw TypeError
-    if p is None:
+    """Reads a specific input parameter from path/elk.in.
+
+    Looks the parameter up in the cached result of parseElkInput, i.e.
+    elk.in is parsed at most once for any number of parameters. Logicals,
+    integers and floats are converted, blocks with a single value return
+    this value instead of a list. The path may point to a folder inside an
+    archive.
+    """
+    blocks = _elkInputBlocks(path)
+    if parameter not in blocks:
         raise NameError(
             '[ERROR] No value for "{p}" found in {f}'.format(
-                p=parameter, f=misc.shortenPath(inputFile)
+                p=parameter,
+                f=misc.shortenPath(misc.joinPath(path, "elk.in")),
             )
         )
-    # do some rudimentary auto-conversion for the most obvious cases
-    for idx, item in enumerate(p):
-        if item == ".true.":
-            p[idx] = True
-        elif item == ".false.":
-            p[idx] = False
-        elif "." in item:
-            p[idx] = float(item)
-        elif item.isdecimal():
-            p[idx] = int(item)
-    # return item instead of list when list contains only one entry
-    if len(p) == 1:
-        return p[0]
-    else:
-        return p
+    value = blocks[parameter]
+    # cached lists must not be modified by callers
+    return list(value) if type(value) is list else value
 
 
 def readElkLattice(path=None):
-    """Reads real lattice vectors from path/LATTICE.OUT."""
+    """Reads real lattice vectors from path/LATTICE.OUT, also in archives."""
     fname = misc.joinPath(path, "LATTICE.OUT")
-    with open(fname, "r") as f:
+    with archive.openFile(fname, "r") as f:
         for line in f:
             if line.startswith("vector a1 :"):
                 a1 = line.split()[3:]
@@ -143,7 +220,7 @@ class ElkInput:
         for key in ["swidth", "wplot", "vecql"]:
             try:
                 if key == "wplot":
-                    value = readElkInputParameter(key)
+                    value = readElkInputParameter(key, path=self.path)
                     try:
                         p["nwplot"] = value[0]
                         p["ngrkf"] = value[1]
@@ -157,7 +234,7 @@ class ElkInput:
                             "in your elk.in"
                         ) from e
                 else:
-                    p[key] = readElkInputParameter(key)
+                    p[key] = readElkInputParameter(key, path=self.path)
             except NameError:
                 if verbose:
                     print("[INFO] Using default value for {}".format(key))
@@ -195,4 +272,44 @@ class ElkInput:
         misc.matrixPrint(self.B)
 
 
+def _inputStamp(path):
+    """Returns (mtime, size) of elk.in and LATTICE.OUT in path."""
+    stamp = []
+    for name in ["elk.in", "LATTICE.OUT"]:
+        stat = archive.stat(misc.joinPath(path, name))
+        stamp.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def getElkInput(path=None, verbose=False):
+    """Returns shared ElkInput of path, created again only if files changed.
+
+    ElkInput is read-only, hence one instance per folder is shared by the
+    whole process, e.g. by reloads of the main window and the batch load
+    dialog. A new instance is created as soon as modification time or size
+    of elk.in or LATTICE.OUT changes.
+
+    Args:
+        path: Folder containing elk.in and LATTICE.OUT, defaults to cwd.
+        verbose: Prints parsed parameters, also for cached instances.
+
+    Raises:
+        FileNotFoundError: elk.in or LATTICE.OUT does not exist.
+    """
+    folder = os.path.abspath(path if path is not None else os.getcwd())
+    stamp = _inputStamp(folder)
+    with _instancesLock:
+        cached = _instances.get(folder)
+    if cached is not None and cached[0] == stamp:
+        elkInput = cached[1]
+        if verbose:
+            with np.printoptions(precision=4, suppress=True):
+                elkInput.printUserInformation()
+        return elkInput
+    elkInput = ElkInput(path=path, verbose=verbose)
+    with _instancesLock:
+        _instances[folder] = (stamp, elkInput)
+    return elkInput
+
+
 # EOF - elk.py
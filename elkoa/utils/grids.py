@@ -0,0 +1,72 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+import weakref
+import zlib
+
+import numpy as np
+
+# registry of interned frequency grids, entries vanish with their last user
+_grids = weakref.WeakValueDictionary()
+
+
+def _key(freqs):
+    """Returns registry key built from length and checksum of grid."""
+    return (len(freqs), zlib.crc32(np.ascontiguousarray(freqs)))
+
+
+def intern(freqs):
+    """Returns shared read-only frequency grid equal to freqs.
+
+    Identical grids, e.g. of all tabs of a task, converted fields or hundreds
+    of batch folders using the same wplot settings, are held only once. Grids
+    are copied on first use, such that views never keep larger arrays alive.
+
+    Args:
+        freqs: 1D array of frequencies or None.
+
+    Returns:
+        Interned read-only grid or None if freqs is None.
+    """
+    if freqs is None:
+        return None
+    freqs = np.asarray(freqs)
+    key = _key(freqs)
+    grid = _grids.get(key)
+    if grid is not None and (grid is freqs or np.array_equal(grid, freqs)):
+        return grid
+    grid = np.array(freqs)
+    grid.flags.writeable = False
+    _grids[key] = grid
+    return grid
+
+
+def sameGrid(freqs1, freqs2):
+    """Checks if two frequency grids are equal.
+
+    Interned grids are compared by identity only, others are interned first.
+    """
+    if freqs1 is freqs2:
+        return True
+    if freqs1 is None or freqs2 is None:
+        return False
+    return intern(freqs1) is intern(freqs2)
+
+
+# EOF - grids.py
@@ -17,10 +17,28 @@
 # You should have received a copy of the GNU General Public License
 # along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
 
+import bz2
+import collections
+from concurrent import futures
+import contextlib
+import functools
+import inspect
+import gzip
+from io import BytesIO, StringIO
+import itertools
+import lzma
 import numpy as np
 import os
+import re
+import shutil
+import tempfile
+import threading
+import weakref
+import wrapt
+import zlib
 
 import elkoa
+from elkoa.utils import archive, cache, grids
 from elkoa.utils.misc import hartreeInEv
 
 
@@ -32,6 +50,23 @@ class InvalidDummyNameError(ValueError):
     """Raised when for tensors or vectors no _ij or _i can be replaced."""
 
 
+class WriteError(OSError):
+    """Raised when one or more files of a vector or tensor were not written.
+
+    Attributes:
+        errors: Dictionary mapping filenames to the exception raised for each.
+        written: List of filenames that were written successfully.
+    """
+
+    def __init__(self, errors, written=()):
+        self.errors = errors
+        self.written = list(written)
+        msg = "Could not write {} file(s):".format(len(errors))
+        for fname, error in errors.items():
+            msg += "\n  {}: {}".format(fname, error)
+        super().__init__(msg)
+
+
 class InvalidDataFileError(Exception):
     """Raised when file to load is in unknown format."""
 
@@ -50,49 +85,637 @@ class InvalidDataFileError(Exception):
         super().__init__(msg)
 
 
-def checkTensorPresent(dummyName):
-    """Tests if at least one tensor element present and reads numFreqs."""
-    avail = False
-    for i in [11, 12, 13, 21, 22, 23, 31, 32, 33]:
-        fname = dummyName.replace("_ij.OUT", "_" + str(i) + ".OUT")
-        avail = avail or os.path.isfile(fname)
-        # in case we found a file, read-off numFreqs for later
-        if avail:
-            _tmp = np.loadtxt(fname)
-            if _tmp.shape[1] == 3:
-                threeColumn = True
-                numFreqs = _tmp.shape[0]
-            else:
-                threeColumn = False
-                numFreqs = _tmp.shape[0] // 2
-            del _tmp
-            break
-    # indicate completely missing tensor with None
-    if not avail:
-        return None, None
+# memo of the reader call running in the current thread, see _readerCall
+_callState = threading.local()
+
+
+@contextlib.contextmanager
+def _readerCall(memo=None):
+    """Memoizes resolved filenames and file stamps during a reader call.
+
+    Decorators and readers look up the same files several times per call,
+    e.g. to build cache keys. Within this context, each filename is resolved
+    and stat'ed only once. Nested calls share the outermost memo, worker
+    threads of mapConcurrently get it passed explicitly via memo.
+    """
+    if getattr(_callState, "memo", None) is not None:
+        yield _callState.memo
+        return
+    _callState.memo = {} if memo is None else memo
+    try:
+        yield _callState.memo
+    finally:
+        _callState.memo = None
+
+
+def _memoized(kind, filename, compute):
+    """Returns compute() memoized for filename in the current reader call."""
+    memo = getattr(_callState, "memo", None)
+    if memo is None:
+        return compute()
+    key = (kind, filename)
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+def _fileStamp(filename, manifest=None):
+    """Wrapper for cache.fileStamp memoized in the current reader call."""
+    return _memoized(
+        "stamp", filename, lambda: cache.fileStamp(filename, manifest)
+    )
+
+
+# openers for transparently (de)compressed data files by extension
+_COMPRESSION = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def isCompressed(filename):
+    """Checks if filename has extension of supported compression formats."""
+    return os.path.splitext(filename)[1] in _COMPRESSION
+
+
+def resolveFilename(filename, manifest=None):
+    """Finds plain or compressed variant of a data file present on disk.
+
+    For e.g. EPSILON_11.OUT, also EPSILON_11.OUT.gz, .bz2 and .xz are tried
+    and vice versa, such that compressed Elk output is found under its usual
+    name. The filename is returned unchanged if no variant exists. If a
+    Manifest of the file's folder is passed, no file system calls are made.
+    Filenames may point inside archives, see elkoa.utils.archive. Within a
+    reader call, each filename is resolved only once, see _readerCall.
+    """
+    return _memoized(
+        "resolve", filename, lambda: _resolveFilename(filename, manifest)
+    )
+
+
+def _resolveFilename(filename, manifest):
+    """Implements resolveFilename without memoization."""
+    if manifest is not None and manifest.covers(filename):
+        exists = manifest.__contains__
+    else:
+        exists = archive.exists
+    if exists(filename):
+        return filename
+    base = filename
+    if isCompressed(filename):
+        base = os.path.splitext(filename)[0]
+    for candidate in [base] + [base + ext for ext in _COMPRESSION]:
+        if exists(candidate):
+            return candidate
+    return filename
+
+
+class Manifest:
+    """Names of all files in a folder, listed once via os.scandir.
+
+    Checking for the presence of Elk output files against a manifest avoids
+    a failed open or stat call for each missing file, e.g. 9 per missing
+    tensor, which is expensive on network file systems. Files outside the
+    listed folder are not covered and always looked up on disk. Folders
+    inside archives are listed from the archive's member index.
+
+    Attributes:
+        path: Absolute path of listed folder.
+        names: Frozenset of names of all files in folder.
+    """
+
+    def __init__(self, path="."):
+        self.path = os.path.abspath(path)
+        self.names = frozenset(archive.listFiles(self.path))
+
+    def covers(self, filename):
+        """Checks if filename is located in the listed folder."""
+        folder = os.path.dirname(os.path.abspath(filename))
+        return folder == self.path
+
+    def __contains__(self, filename):
+        return self.covers(filename) and (
+            os.path.basename(filename) in self.names
+        )
+
+    def isMissing(self, filename):
+        """Checks if neither file nor compressed variant has been listed."""
+        if not self.covers(filename):
+            return False
+        return resolveFilename(filename, self) not in self
+
+    def hasOutput(self, filename):
+        """Checks if data file or any element file of a _ij dummy is listed.
+
+        Files outside the listed folder are assumed to be present.
+        """
+        if not self.covers(filename):
+            return True
+        if "_ij" not in filename:
+            return not self.isMissing(filename)
+        head, tail = os.path.basename(filename).split("_ij", 1)
+        pattern = re.compile(
+            "{}_[0-9]{{2}}{}(?:{})?".format(
+                re.escape(head),
+                re.escape(tail),
+                "|".join(re.escape(ext) for ext in _COMPRESSION),
+            )
+        )
+        return any(pattern.fullmatch(name) for name in self.names)
+
+
+def openFile(filename, mode="rb"):
+    """Opens plain or compressed file depending on its extension.
+
+    Compressed files are (de)compressed as a stream, no temporary files are
+    created. In read mode, filename is resolved via resolveFilename first and
+    may point inside an archive, see elkoa.utils.archive.
+    """
+    if "r" in mode:
+        filename = resolveFilename(filename)
+    ext = os.path.splitext(filename)[1]
+    if "r" in mode and archive.isMember(filename):
+        if ext not in _COMPRESSION:
+            return archive.openFile(filename, mode)
+        # decompressors don't close passed file objects, decompress at once
+        with archive.openFile(filename) as f:
+            raw = _COMPRESSION[ext](f).read()
+        return BytesIO(raw) if "b" in mode else StringIO(raw.decode())
+    return _COMPRESSION.get(ext, open)(filename, mode)
+
+
+def tensorFiles(dummyName):
+    """Returns filenames of all 9 tensor elements for a _ij dummy name."""
+    return matrixFiles(dummyName, (3, 3), 1)
+
+
+def matrixFiles(dummyName, shape=(4, 4), offset=0):
+    """Returns filenames of all elements of a response matrix.
+
+    Element indices run from offset to offset + shape - 1, e.g. from
+    CHI_00.OUT to CHI_33.OUT for the 4x4 matrix of Elk task 330.
+    """
+    rows, cols = shape
+    return [
+        dummyName.replace("_ij.OUT", "_{}{}.OUT".format(i, j))
+        for i in range(offset, offset + rows)
+        for j in range(offset, offset + cols)
+    ]
+
+
+def scalarFiles(filename):
+    """Returns filenames a scalar field is read from."""
+    return [filename]
+
+
+def _bindOptions(reader, dependencies, args, kwargs):
+    """Returns files a reader call depends on, its options and manifest.
+
+    The reader's first argument is mapped to the list of files via
+    dependencies, which also receives reader arguments of the same name, e.g.
+    shape. Options that do not alter the result are dropped.
+    """
+    bound = inspect.signature(reader).bind(*args, **kwargs)
+    bound.apply_defaults()
+    options = dict(bound.arguments)
+    filename = options.pop(next(iter(bound.arguments)))
+    for opt in ["numFreqsTest", "workers"]:
+        options.pop(opt, None)
+    manifest = options.pop("manifest", None)
+    params = inspect.signature(dependencies).parameters
+    files = dependencies(
+        filename, **{k: v for k, v in options.items() if k in params}
+    )
+    files = [resolveFilename(f, manifest) for f in files]
+    return files, options, manifest
+
+
+def cached(dependencies):
+    """Decorator storing reader results in the global data cache.
+
+    The reader's first argument is mapped to the list of files the result
+    depends on via dependencies, which also receives reader arguments of the
+    same name, e.g. shape. All further reader arguments except for those that
+    do not alter the result are part of the cache key.
+    """
+
+    @wrapt.decorator
+    def wrapper(reader, instance, args, kwargs):
+        dataCache = cache.getCache()
+        if dataCache is None:
+            return reader(*args, **kwargs)
+        with _readerCall():
+            files, options, manifest = _bindOptions(
+                reader, dependencies, args, kwargs
+            )
+            stamps = [_fileStamp(f, manifest) for f in files]
+            key = dataCache.keyFromStamps(
+                stamps, reader=reader.__name__, **options
+            )
+            result = dataCache.load(key)
+            if result is None:
+                result = reader(*args, **kwargs)
+                dataCache.store(key, *result)
+            return result
+
+    return wrapper
+
+
+def _xxhash():
+    """Returns fastest available xxhash constructor or None."""
+    try:
+        import xxhash
+    except ImportError:
+        return None
+    return getattr(xxhash, "xxh3_64", xxhash.xxh64)
+
+
+def _hashBlocks(blocks):
+    """Hashes iterable of byte blocks, see contentHash."""
+    hasher = _xxhash()
+    h = hasher() if hasher is not None else None
+    crc, adler = 0, 1
+    size = 0
+    for block in blocks:
+        size += len(block)
+        if h is not None:
+            h.update(block)
+        else:
+            crc = zlib.crc32(block, crc)
+            adler = zlib.adler32(block, adler)
+    if h is not None:
+        return (size, h.hexdigest())
+    return (size, crc, adler)
+
+
+def contentHash(filename, blockSize=2 ** 24, manifest=None):
+    """Returns fast non-cryptographic hash of a file's raw content.
+
+    Uses xxhash if installed, otherwise CRC32 combined with Adler-32 from
+    zlib. The file size is part of the hash to make collisions even less
+    likely. Missing files return None, see Manifest for skipping them.
+    """
+    if manifest is not None and manifest.isMissing(filename):
+        return None
+    try:
+        with archive.openFile(resolveFilename(filename)) as f:
+            blocks = iter(functools.partial(f.read, blockSize), b"")
+            return _hashBlocks(blocks)
+    except OSError:
+        return None
+
+
+def _recordParsed(filename, raw=None):
+    """Marks file as parsed in the current reader call, see shared.
+
+    If the raw (decompressed) content is at hand, it is hashed right away,
+    otherwise the file is hashed only once shared needs it.
+    """
+    memo = getattr(_callState, "memo", None)
+    if memo is None:
+        return
+    path = _fileStamp(filename)[0]
+    memo["parsed", path] = None if raw is None else _hashBlocks([raw])
+
+
+# content hashes of files parsed so far by (path, size, mtime)
+_contentHashes = {}
+# results of deduplicated reads, entries vanish with their last user
+_shared = weakref.WeakValueDictionary()
+# dependencies of readers decorated with shared by reader name
+_sharedReaders = {}
+
+
+def _sharedKey(reader, dependencies, args, kwargs, hashParsed=False):
+    """Implements sharedKey, optionally hashing files parsed in this call."""
+    files, options, manifest = _bindOptions(reader, dependencies, args, kwargs)
+    memo = getattr(_callState, "memo", None) or {}
+    identities = []
+    for f in files:
+        stamp = _fileStamp(f, manifest)
+        if stamp[1] is None:
+            identities.append(None)
+            continue
+        if stamp not in _contentHashes and hashParsed:
+            if ("parsed", stamp[0]) in memo:
+                h = memo["parsed", stamp[0]] or contentHash(f)
+                _contentHashes[stamp] = h
+        identities.append(_contentHashes.get(stamp, stamp))
+    if all(i is None for i in identities):
+        return None
+    return (reader.__name__, tuple(identities), repr(sorted(options.items())))
+
+
+def sharedKey(reader, *args, **kwargs):
+    """Returns key identifying a reader call by content of its files.
+
+    Files are identified by their content hash once they have been parsed in
+    this process, see shared, otherwise by path, size and modification time.
+    No file is read, only stat'ed.
+
+    Returns:
+        Hashable key or None if reader is not decorated with shared or none
+        of the files exists.
+    """
+    dependencies = _sharedReaders.get(getattr(reader, "__name__", None))
+    if dependencies is None:
+        return None
+    with _readerCall():
+        return _sharedKey(reader, dependencies, args, kwargs)
+
+
+def knownHashes(reader, *args, **kwargs):
+    """Returns {stamp: content hash} of files of a reader call hashed so far.
+
+    Used to pass hashes computed in worker processes to the parent process,
+    see recordHashes.
+    """
+    dependencies = _sharedReaders.get(getattr(reader, "__name__", None))
+    if dependencies is None:
+        return {}
+    with _readerCall():
+        files, _, manifest = _bindOptions(reader, dependencies, args, kwargs)
+        stamps = [_fileStamp(f, manifest) for f in files]
+    return {s: _contentHashes[s] for s in stamps if s in _contentHashes}
+
+
+def recordHashes(hashes):
+    """Adds content hashes returned by knownHashes, e.g. of other processes."""
+    _contentHashes.update(hashes)
+
+
+def getShared(key):
+    """Returns shared (freqs, field) stored for key or None."""
+    freqs, field = _shared.get(key + (0,)), _shared.get(key + (1,))
+    if freqs is None or field is None:
+        return None
+    return freqs, field
+
+
+def storeShared(key, freqs, field):
+    """Marks result read-only and shares it for further calls with key.
+
+    If a result is already shared for key, e.g. read from a file with the
+    same content in the meantime, that one is returned instead.
+
+    Returns:
+        Tuple[freqs, field] with interned, read-only frequency grid.
+    """
+    existing = getShared(key)
+    if existing is not None:
+        return existing
+    # identical grids are shared even for files with different content
+    freqs = grids.intern(freqs)
+    for idx, array in enumerate([freqs, field]):
+        array.flags.writeable = False
+        _shared[key + (idx,)] = array
+    return freqs, field
+
+
+def shared(dependencies):
+    """Decorator sharing reader results of files with identical content.
+
+    Byte-identical outputs in different folders, e.g. in parameter studies,
+    share the same arrays, which are therefore marked read-only; copy them
+    before modifying in place. Results are only kept as long as they are in
+    use elsewhere.
+
+    Files are first looked up by path, size and modification time, such that
+    repeated reads of unchanged files neither read nor hash them. Only files
+    actually parsed by the reader are hashed afterwards, see contentHash,
+    reusing decompressed content where available. Results from the data
+    cache are identified by file state only.
+    """
+
+    @wrapt.decorator
+    def wrapper(reader, instance, args, kwargs):
+        with _readerCall():
+            key = _sharedKey(reader, dependencies, args, kwargs)
+            if key is None:
+                return reader(*args, **kwargs)
+            result = getShared(key)
+            if result is not None:
+                return result
+            result = reader(*args, **kwargs)
+            key = _sharedKey(reader, dependencies, args, kwargs, True)
+            return storeShared(key, *result)
+
+    def decorator(reader):
+        _sharedReaders[reader.__name__] = dependencies
+        return wrapper(reader)
+
+    return decorator
+
+
+# Fortran fills fields that exceed their width with asterisks
+_OVERFLOW_PATTERN = re.compile(rb"\*+")
+# Fortran double precision exponents as in 1.0D-03
+_EXPONENT_TABLE = bytes.maketrans(b"Dd", b"EE")
+# default number of frequencies per chunk for streaming readers and writers
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _sanitize(raw):
+    """Converts Fortran peculiarities in raw bytes to numpy readable form."""
+    if b"*" in raw:
+        raw = _OVERFLOW_PATTERN.sub(b" nan ", raw)
+    if b"D" in raw or b"d" in raw:
+        raw = raw.translate(_EXPONENT_TABLE)
+    return raw
+
+
+def _loadBytes(raw, filename):
+    """Converts whitespace separated numbers in raw bytes to 2D array."""
+    try:
+        return np.loadtxt(BytesIO(raw), comments="#", ndmin=2)
+    except ValueError as e:
+        raise ValueError("Invalid data in {}: {}".format(filename, e)) from e
+
+
+def loadData(filename):
+    """Loads numeric data from Elk output or similarly formatted files.
+
+    Plain files are handed to np.loadtxt directly, compressed files and
+    archive members are decompressed into memory first. Comments starting
+    with '#' and blank lines, e.g. the separator between stacked real and
+    imaginary parts in Elk output files, are skipped. Only if parsing fails,
+    Fortran peculiarities are converted, i.e. overflow markers (asterisks) to
+    NaN and D exponents to E, and the data is parsed once more.
+
+    Args:
+        filename: Filename or full path of file to load.
+
+    Returns:
+        2D numpy array of shape (rows, columns).
+
+    Raises:
+        OSError: File cannot be found or opened.
+        ValueError: File contains non-numeric data, no data or no
+            rectangular table.
+    """
+    filename = resolveFilename(filename)
+    raw = None
+    source = filename
+    if isCompressed(filename) or archive.isMember(filename):
+        with openFile(filename) as f:
+            raw = f.read()
+        source = BytesIO(raw)
+    try:
+        data = np.loadtxt(source, comments="#", ndmin=2)
+    except ValueError:
+        if raw is None:
+            with open(filename, "rb") as f:
+                raw = f.read()
+        data = _loadBytes(_sanitize(raw), filename)
+    if data.size == 0:
+        raise ValueError("No data found in {}.".format(filename))
+    _recordParsed(filename, raw)
+    return data
+
+
+def getLayout(array):
+    """Returns numFreqs and column layout of data as returned by loadData."""
+    if array.shape[1] == 3:
+        return array.shape[0], True
     else:
-        return numFreqs, threeColumn
+        return array.shape[0] // 2, False
 
 
-def separateParts(array, num, threeColumn):
-    """Converts array to 3x3 tensor separating real and imaginary parts."""
+def tryLoadData(filename, manifest=None):
+    """Wrapper for loadData returning None for missing files."""
+    if manifest is not None and manifest.isMissing(filename):
+        return None
+    try:
+        return loadData(filename)
+    except OSError:
+        return None
+
+
+def mapConcurrently(fun, items, workers=1):
+    """Applies fun to all items, optionally using a bounded thread pool.
+
+    Results are returned in the order of items regardless of the order in
+    which the worker threads finish.
+    """
+    if workers is None or workers <= 1 or len(items) <= 1:
+        return [fun(item) for item in items]
+    workers = min(workers, len(items))
+    memo = getattr(_callState, "memo", None)
+
+    def run(item):
+        # continue the reader call of the calling thread, if any
+        if memo is None:
+            return fun(item)
+        with _readerCall(memo):
+            return fun(item)
+
+    with futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, items))
+
+
+def separateParts(array, num, threeColumn, shape=(3, 3)):
+    """Converts array to response matrix separating real and imag. parts.
+
+    Real and imaginary parts are taken as views of the (reshaped) input and
+    written into a preallocated complex buffer in a single vectorized pass.
+    The arithmetic mirrors real + imag * 1j so that results are bit-identical
+    to the former element-wise construction, including signed zeros.
+
+    Args:
+        array: Raw data of all element files, either as list of 2D arrays or
+            as one contiguous array of shape (elements, rows, columns).
+        num: Number of frequencies per tensor element.
+        threeColumn: Indicates if raw data is in 3-column style or Elk style
+            (real and imaginary part stacked in 2 columns).
+        shape: Shape of response matrix, e.g. (4, 4) for task 330 CHI files.
+
+    Returns:
+        Complex numpy array of shape (3, 3, num) or shape + (num,).
+    """
+    shape = tuple(shape)
     if threeColumn:
-        array = np.asarray(array).reshape(3, 3, num, 3)
-        real = array[:, :, :, 1]
-        imag = array[:, :, :, 2]
+        array = np.asarray(array).reshape(shape + (num, 3))
+        real = array[..., 1]
+        imag = array[..., 2]
     else:
-        array = np.asarray(array).reshape(3, 3, 2 * num, 2)
-        real = array[:, :, :num, 1]
-        imag = array[:, :, num:, 1]
+        array = np.asarray(array).reshape(shape + (2 * num, 2))
+        real = array[..., :num, 1]
+        imag = array[..., num:, 1]
 
     # rebuild tensor structure using complex floats
-    ten = np.zeros(real.shape, dtype=np.complex_)
-    for i in range(num):
-        ten[:, :, i] = real[:, :, i] + imag[:, :, i] * 1j
+    ten = np.empty(real.shape, dtype=np.complex_)
+    np.multiply(imag, 0.0, out=ten.real)
+    ten.real += real
+    np.add(imag, 0.0, out=ten.imag)
     return ten
 
 
-def readTensor(dummyName, numFreqsTest=None, hartree=True):
+def _readMatrix(
+    dummyName,
+    numFreqsTest,
+    hartree,
+    workers,
+    wrange,
+    shape,
+    offset,
+    manifest=None,
+):
+    """Implements readTensor and readMatrix for arbitrary matrix shapes."""
+    # check for valid dummy name
+    if "_ij" not in dummyName:
+        raise InvalidDummyNameError(
+            "dummyName must contain '_ij' to replace with tensor indices."
+        )
+    files = matrixFiles(dummyName, shape, offset)
+    if wrange is not None:
+        return _readMatrixWindow(
+            files, wrange, hartree, workers, shape, manifest
+        )
+    # if at least one element is present, read and store it, keep rest NaN;
+    # layout and numFreqs are taken from the first file that could be read
+    load = functools.partial(tryLoadData, manifest=manifest)
+    loads = mapConcurrently(load, files, workers)
+    data = None
+    for idx, load in enumerate(loads):
+        # missing elements remain NaN; necessary for later reshaping!
+        if load is None:
+            continue
+        if data is None:
+            numFreqs, threeColumn = getLayout(load)
+            # preallocate raw buffer such that separateParts works on views
+            data = np.full((len(files),) + load.shape, np.nan)
+            first = load
+            # for safety, check against numFreqs from elk.in b/c Elk v5
+            # task 320 deletes w=0 data point in each
+            # EPSILON_TDDFT_ij.OUT file regardeless of 'kernel' in use
+            # (previously happened only when using bootstrap kernel)
+            if numFreqsTest and numFreqs != numFreqsTest:
+                print(
+                    "[WARNING] number of frequencies from elk.in "
+                    "(nwplot) differ \n"
+                    "\t  from actual number of data points in {},\n"
+                    "\t  changing from {} to {}.".format(
+                        dummyName, numFreqsTest, numFreqs
+                    )
+                )
+        data[idx] = load
+    if data is None:
+        raise TensorNotFoundError("No data for this tensor available.")
+    ten = separateParts(data, numFreqs, threeColumn, shape)
+    if hartree:
+        freqs = first[0:numFreqs, 0] * hartreeInEv
+    else:
+        freqs = first[0:numFreqs, 0]
+    return freqs, ten
+
+
+@shared(tensorFiles)
+@cached(tensorFiles)
+def readTensor(
+    dummyName,
+    numFreqsTest=None,
+    hartree=True,
+    workers=1,
+    wrange=None,
+    manifest=None,
+):
     """Reads complex tensor data from Elk output files.
 
     Tries to open all 9 files TEN_XY.OUT for a given tensor where X and Y each
@@ -103,7 +726,9 @@ def readTensor(dummyName, numFreqsTest=None, hartree=True):
     In case not a single file for a specific tensor is available, the array is
     discarded and None is returned. If at least one file has been read
     successfully, real and imaginary parts are saved together as complex
-    numbers and will be returned as tensor field.
+    numbers and will be returned as tensor field. Compressed element files
+    are handled as in readScalar. Results are stored in the global data cache
+    if enabled, see elkoa.utils.cache, and returned read-only, see shared.
 
     Args:
         dummyName: Filename with _ij.OUT ending as dummy for _11.OUT etc.
@@ -111,6 +736,12 @@ def readTensor(dummyName, numFreqsTest=None, hartree=True):
             checking against, not strictly required for loading.
         hartree: Indicates if frequencies from file are given in Hartree units
             and need to be converted to electron volts.
+        workers: Number of threads used to read and parse the element files
+            concurrently, e.g. for high latency network file systems.
+        wrange: Optional frequency window [wmin, wmax] in eV. If given, only
+            data points within this window are kept, see readWindow.
+        manifest: Optional Manifest of the folder, such that missing element
+            files are skipped without accessing the file system.
 
     Returns:
         Tuple[freqs, tensor] if there was at least one data file. Frequencies
@@ -122,58 +753,110 @@ def readTensor(dummyName, numFreqsTest=None, hartree=True):
         InvalidDummyNameError: dummyName does not contain substring "_ij" that
             could be replaced by tensor indices.
     """
-    # check for valid dummy name
-    if "_ij" not in dummyName:
-        raise InvalidDummyNameError(
-            "dummyName must contain '_ij' to replace with tensor indices."
-        )
-    numFreqs, threeColumn = checkTensorPresent(dummyName)
-    if numFreqs is None:
-        raise TensorNotFoundError("No data for this tensor available.")
-    # if at least one element is present, read and store it, fill rest with NaN
-    data = []
-    for i in [11, 12, 13, 21, 22, 23, 31, 32, 33]:
-        fname = dummyName.replace("_ij.OUT", "_" + str(i) + ".OUT")
-        try:
-            load = np.loadtxt(fname)
-            data.append(load)
-        except OSError:
-            # append list of NaN instead of returning an error;
-            # necessary for later reshaping!
-            if threeColumn:
-                data.append(np.full((numFreqs, 2), np.nan))
-            else:
-                data.append(np.full((2 * numFreqs, 2), np.nan))
-        # process data if loading was successfull
-        else:
-            # for safety, check against numFreqs from elk.in b/c Elk v5
-            # task 320 deletes w=0 data point in each
-            # EPSILON_TDDFT_ij.OUT file regardeless of 'kernel' in use
-            # (previously happened only when using bootstrap kernel)
-            if numFreqsTest and numFreqs != numFreqsTest:
-                print(
-                    "[WARNING] number of frequencies from elk.in "
-                    "(nwplot) differ \n"
-                    "\t  from actual number of data points in {},\n"
-                    "\t  changing from {} to {}.".format(
-                        dummyName, numFreqsTest, numFreqs
-                    )
+    return _readMatrix(
+        dummyName, numFreqsTest, hartree, workers, wrange, (3, 3), 1, manifest
+    )
+
+
+@shared(matrixFiles)
+@cached(matrixFiles)
+def readMatrix(
+    dummyName,
+    numFreqsTest=None,
+    hartree=True,
+    workers=1,
+    wrange=None,
+    shape=(4, 4),
+    offset=0,
+    manifest=None,
+):
+    """Reads complex response matrix of arbitrary shape from Elk output files.
+
+    Generalization of readTensor, e.g. for the full 4x4 CHI/CHI0 matrices of
+    task 330 with indices 0..3, where 0 denotes the density and 1..3 the
+    magnetization components. All element files are read in one batched pass,
+    missing elements are filled with NaN. Parts like the density response
+    (0, 0) or the magnetization block [1:, 1:] can then be used as views.
+
+    Args:
+        dummyName: Filename with _ij.OUT ending as dummy for _00.OUT etc.
+        numFreqsTest: Number of frequencies according to elk.in - only used
+            for checking against, not strictly required for loading.
+        hartree: Indicates if frequencies from file are given in Hartree units
+            and need to be converted to electron volts.
+        workers: Number of threads used to read the element files.
+        wrange: Optional frequency window [wmin, wmax] in eV.
+        shape: Number of rows and columns of the response matrix.
+        offset: Index of first row/column in filenames, i.e. 0 for CHI_00.OUT
+            or 1 for EPSILON_11.OUT.
+        manifest: Optional Manifest of the folder, see readTensor.
+
+    Returns:
+        Tuple[freqs, matrix] with frequencies in eV and complex matrix data of
+        shape shape + (num_freqs,).
+
+    Raises:
+        TensorNotFoundError: Not at least one element file is loadable.
+        InvalidDummyNameError: dummyName does not contain substring "_ij" that
+            could be replaced by matrix indices.
+    """
+    return _readMatrix(
+        dummyName,
+        numFreqsTest,
+        hartree,
+        workers,
+        wrange,
+        shape,
+        offset,
+        manifest,
+    )
+
+
+def _scalarField(load, filename, numFreqsTest=None, hartree=True):
+    """Converts data as returned by loadData to frequencies and field."""
+    # construct field depending on 2 or 3 column data file
+    if load.shape[1] == 3:
+        freqs = load[:, 0]
+        real = load[:, 1]
+        imag = load[:, 2]
+    elif load.shape[1] == 2:
+        numFreqs = load.shape[0] // 2
+        # optionally check against passed entry from e.g. elk.in
+        if numFreqsTest and numFreqs != numFreqsTest:
+            print(
+                "[WARNING] number of frequencies from elk.in "
+                "(nwplot) differ \n"
+                "\t  from actual number of data points in {},\n"
+                "\t  changing from {} to {}.".format(
+                    filename, numFreqsTest, numFreqs
                 )
-                # prevent spawning this error 9 times
-                numFreqsTest = numFreqs
-    ten = separateParts(data, numFreqs, threeColumn)
-    if hartree:
-        freqs = load[0:numFreqs, 0] * hartreeInEv
-    else:
+            )
         freqs = load[0:numFreqs, 0]
-    return freqs, ten
+        real = load[:numFreqs, 1]
+        imag = load[numFreqs:, 1]
+    else:
+        raise InvalidDataFileError(os.path.basename(filename))
 
+    field = real + imag * 1j
 
-def readScalar(filename, numFreqsTest=None, hartree=True):
+    if hartree:
+        freqs *= hartreeInEv
+
+    return freqs, field
+
+
+@shared(scalarFiles)
+@cached(scalarFiles)
+def readScalar(
+    filename, numFreqsTest=None, hartree=True, wrange=None, manifest=None
+):
     """Reads complex data points of scalar fields from file.
 
     Loads data from 2 or 3 column files and stores complex values in a
-    multi-dimensional numpy array.
+    multi-dimensional numpy array. Files compressed with gzip, bzip2 or xz
+    are found and decompressed transparently, see resolveFilename. Results
+    are stored in the global data cache if enabled, see elkoa.utils.cache.
+    Files with identical content share the same read-only arrays, see shared.
 
     Args:
         filename: Filename or full path of file to load.
@@ -181,46 +864,485 @@ def readScalar(filename, numFreqsTest=None, hartree=True):
             against when loading from Elk output files.
         hartree: Indicates if frequencies from ile need to be converted
             from hartree to electron volts.
+        wrange: Optional frequency window [wmin, wmax] in eV. If given, only
+            data points within this window are kept, see readWindow.
+        manifest: Optional Manifest of the folder, such that a missing file
+            raises FileNotFoundError without accessing the file system.
 
     Returns:
         Tuple[freqs, tensor] otherwise. Frequencies are returned in units of
         eV, field data is a complex numpy array.
     """
+    if manifest is not None and manifest.isMissing(filename):
+        raise FileNotFoundError("No such file: {}".format(filename))
+    if wrange is not None:
+        return readWindow(filename, wrange, hartree)
     try:
         basename = os.path.basename(filename)
-        load = np.loadtxt(filename, comments="#")
-        # construct field depending on 2 or 3 column data file
-        if load.shape[1] == 3:
-            freqs = load[:, 0]
-            real = load[:, 1]
-            imag = load[:, 2]
-        elif load.shape[1] == 2:
-            numFreqs = load.shape[0] // 2
-            # optionally check against passed entry from e.g. elk.in
-            if numFreqsTest and numFreqs != numFreqsTest:
-                print(
-                    "[WARNING] number of frequencies from elk.in "
-                    "(nwplot) differ \n"
-                    "\t  from actual number of data points in {},\n"
-                    "\t  changing from {} to {}.".format(
-                        filename, numFreqsTest, numFreqs
-                    )
+        # the layout follows from the parsed data, the file is read once
+        load = loadData(filename)
+        return _scalarField(load, filename, numFreqsTest, hartree)
+    except (ValueError, IndexError):
+        raise InvalidDataFileError(basename)
+
+
+# column indices or header names of one field stored in a wide table, imag
+# may be None for purely real data
+Series = collections.namedtuple("Series", ["label", "real", "imag"])
+
+
+def _isNumeric(tokens):
+    """Checks if all tokens of a line can be converted to floats."""
+    try:
+        [float(t) for t in tokens]
+    except ValueError:
+        return False
+    return len(tokens) > 0
+
+
+def readTableHeader(filename, delimiter=None):
+    """Determines column names and separator of a wide data table.
+
+    Only lines up to the first data line are read. A line of column names
+    directly before the first data line, e.g. the header of CSV files, is
+    recognized with or without leading '#', but only if it has as many
+    entries as there are data columns.
+
+    Args:
+        filename: Filename or full path of file to inspect.
+        delimiter: Column separator; "," if the first data line contains a
+            comma and whitespace otherwise if None.
+
+    Returns:
+        Tuple[names, delimiter, skiprows] with list of column names or None,
+        column separator (None for whitespace) and number of lines before
+        the first data line.
+
+    Raises:
+        OSError: File cannot be found or opened.
+        ValueError: File contains no data.
+    """
+    names = None
+    with openFile(filename, "rt") as f:
+        for skiprows, line in enumerate(f):
+            text = line.strip()
+            isComment = text.startswith("#")
+            text = text.lstrip("#") if isComment else text.split("#")[0]
+            if not text.strip():
+                continue
+            sep = delimiter
+            if sep is None and "," in text:
+                sep = ","
+            tokens = [t.strip() for t in text.split(sep)]
+            if not isComment and _isNumeric(tokens):
+                if names is not None and len(names) != len(tokens):
+                    names = None
+                return names, sep, skiprows
+            names = tokens
+    raise ValueError("No data found in {}.".format(filename))
+
+
+def readColumns(filename, series, freqColumn=0, hartree=True, delimiter=None):
+    """Reads several fields from selected columns of a wide table at once.
+
+    Reference data often comes as CSV or whitespace separated tables with
+    many spectra side by side. All series are read in a single pass over the
+    file, converting only the selected columns, instead of re-reading the
+    file for each series.
+
+    Args:
+        filename: Filename or full path of file to load.
+        series: List of Series or (label, real, imag) tuples mapping columns
+            to fields. Columns are given by index or header name, see
+            readTableHeader, imag may be None for real data. Without label,
+            the name or index of the real column is used.
+        freqColumn: Index or header name of the frequency column.
+        hartree: Indicates if frequencies from file need to be converted
+            from hartree to electron volts.
+        delimiter: Column separator, detected by readTableHeader if None.
+
+    Returns:
+        Tuple[freqs, fields] with frequencies in eV and list of (label,
+        field) tuples in order of series, fields being complex 1D arrays.
+
+    Raises:
+        OSError: File cannot be found or opened.
+        ValueError: Unknown columns or invalid data in selected columns.
+    """
+    names, delimiter, skiprows = readTableHeader(filename, delimiter)
+
+    def index(column):
+        if isinstance(column, str) and not column.isdecimal():
+            if names is None or column not in names:
+                raise ValueError(
+                    "No column {} in {}.".format(column, filename)
                 )
-            freqs = load[0:numFreqs, 0]
-            real = load[:numFreqs, 1]
-            imag = load[numFreqs:, 1]
-        else:
+            return names.index(column)
+        return int(column)
+
+    series = [Series(*s) for s in series]
+    columns = [index(freqColumn)]
+    for s in series:
+        columns.append(index(s.real))
+        columns.append(None if s.imag is None else index(s.imag))
+    usecols = sorted({c for c in columns if c is not None})
+    with openFile(filename, "rt") as f:
+        load = np.loadtxt(
+            f,
+            delimiter=delimiter,
+            comments="#",
+            skiprows=skiprows,
+            usecols=usecols,
+            ndmin=2,
+        )
+    # map columns to positions in loaded array
+    position = {c: idx for idx, c in enumerate(usecols)}
+    freqs = load[:, position[columns[0]]].copy()
+    if hartree:
+        freqs *= hartreeInEv
+    fields = []
+    for s, real, imag in zip(series, columns[1::2], columns[2::2]):
+        field = load[:, position[real]] + 0j
+        if imag is not None:
+            field.imag = load[:, position[imag]]
+        label = s.label
+        if label is None:
+            label = names[real] if names is not None else str(real)
+        fields.append((label, field))
+    return freqs, fields
+
+
+def parseColumnMap(text):
+    """Parses column map as entered by users, e.g. "0; xx: 1, 2; yy: 3, 4".
+
+    Entries are separated by semicolons. The first one is the frequency
+    column, each further one a series of real and optional imaginary column,
+    optionally preceded by "label:". Columns are given by index or name.
+
+    Returns:
+        Tuple[freqColumn, series] to be passed to readColumns.
+
+    Raises:
+        ValueError: Map has no series or invalid entries.
+    """
+
+    def column(text):
+        text = text.strip()
+        if not text:
+            raise ValueError("Empty column in column map.")
+        return int(text) if text.isdecimal() else text
+
+    entries = [e for e in text.split(";") if e.strip()]
+    if len(entries) < 2:
+        raise ValueError("Column map needs frequency column and a series.")
+    series = []
+    for entry in entries[1:]:
+        label, _, columns = entry.rpartition(":")
+        columns = [column(c) for c in columns.split(",")]
+        if len(columns) > 2:
+            raise ValueError("Too many columns in series {}.".format(entry))
+        columns.append(None)
+        series.append(Series(label.strip() or None, *columns[:2]))
+    return column(entries[0]), series
+
+
+def _isData(line):
+    """Checks if raw line contains data, i.e. is neither blank nor comment."""
+    return bool(line.split(b"#", 1)[0].strip())
+
+
+def _dataLines(lines):
+    """Yields data lines without comments, skipping blank lines."""
+    for line in lines:
+        line = line.split(b"#", 1)[0]
+        if line.strip():
+            yield line
+
+
+def _parseLines(lines, numColumns, filename):
+    """Parses list of raw data lines to 2D array of shape (rows, columns)."""
+    data = _loadBytes(_sanitize(b"\n".join(lines)), filename)
+    if data.shape[1] != numColumns:
+        raise ValueError("Inconsistent columns in {}.".format(filename))
+    return data
+
+
+def _chunkLines(lines, chunkSize):
+    """Groups iterable of lines into lists of at most chunkSize lines."""
+    while True:
+        chunk = list(itertools.islice(lines, chunkSize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _skipRealPart(f):
+    """Advances open file behind real part of Elk style data.
+
+    The first data line must already be consumed. The imaginary part starts
+    after the first blank line following the data. For files without such a
+    separator, the file is rewound and half of the data lines are skipped.
+
+    Returns:
+        Number of frequencies, i.e. data lines in the real part.
+    """
+    numLines = 1
+    for line in f:
+        if not line.strip():
+            return numLines
+        if _isData(line):
+            numLines += 1
+    numFreqs = numLines // 2
+    f.seek(0)
+    for _ in itertools.islice(_dataLines(f), numFreqs):
+        pass
+    return numFreqs
+
+
+def iterScalar(filename, chunkSize=DEFAULT_CHUNK_SIZE, hartree=True):
+    """Reads complex data points of scalar fields chunk by chunk.
+
+    Generator version of readScalar for fields that are too large to be held
+    in memory at once. At most chunkSize frequencies are parsed at a time. For
+    Elk style files with real and imaginary parts stacked in 2 columns, the
+    file is opened twice such that matching real and imaginary values can be
+    read side by side.
+
+    Args:
+        filename: Filename or full path of file to load.
+        chunkSize: Maximum number of frequencies per chunk.
+        hartree: Indicates if frequencies from file need to be converted
+            from hartree to electron volts.
+
+    Yields:
+        Tuple[freqs, field] for consecutive chunks of frequencies, where
+        frequencies are in units of eV and field data is a complex 1D array.
+
+    Raises:
+        OSError: File cannot be found or opened.
+        InvalidDataFileError: File is in unknown format.
+    """
+    basename = os.path.basename(filename)
+    with openFile(filename) as fReal, openFile(filename) as fImag:
+        try:
+            numColumns = len(next(_dataLines(fImag)).split())
+            if numColumns == 3:
+                chunks = _chunkLines(_dataLines(fReal), chunkSize)
+                for lines in chunks:
+                    data = _parseLines(lines, 3, basename)
+                    freqs = data[:, 0]
+                    field = data[:, 1] + data[:, 2] * 1j
+                    if hartree:
+                        freqs *= hartreeInEv
+                    yield freqs, field
+            elif numColumns == 2:
+                numFreqs = _skipRealPart(fImag)
+                realLines = itertools.islice(_dataLines(fReal), numFreqs)
+                imagLines = _dataLines(fImag)
+                for lines in _chunkLines(realLines, chunkSize):
+                    real = _parseLines(lines, 2, basename)
+                    lines = list(itertools.islice(imagLines, len(lines)))
+                    imag = _parseLines(lines, 2, basename)
+                    if imag.shape != real.shape:
+                        raise InvalidDataFileError(basename)
+                    freqs = real[:, 0]
+                    field = real[:, 1] + imag[:, 1] * 1j
+                    if hartree:
+                        freqs *= hartreeInEv
+                    yield freqs, field
+            else:
+                raise InvalidDataFileError(basename)
+        except (StopIteration, ValueError):
             raise InvalidDataFileError(basename)
 
-        field = real + imag * 1j
 
-        if hartree:
-            freqs *= hartreeInEv
+def iterTensor(dummyName, chunkSize=DEFAULT_CHUNK_SIZE, hartree=True):
+    """Reads complex tensor data from Elk output files chunk by chunk.
+
+    Generator version of readTensor for fields that are too large to be held
+    in memory at once. All available tensor element files are read in
+    lockstep, missing elements are filled with NaN.
+
+    Args:
+        dummyName: Filename with _ij.OUT ending as dummy for _11.OUT etc.
+        chunkSize: Maximum number of frequencies per chunk.
+        hartree: Indicates if frequencies from file are given in Hartree units
+            and need to be converted to electron volts.
+
+    Yields:
+        Tuple[freqs, tensor] for consecutive chunks of frequencies, where
+        frequencies are in units of eV and tensor data is a complex numpy
+        array of shape (3, 3, len(freqs)).
+
+    Raises:
+        TensorNotFoundError: Not at least one tensor data file is available.
+        InvalidDummyNameError: dummyName does not contain substring "_ij" that
+            could be replaced by tensor indices.
+        InvalidDataFileError: Element files are in unknown format or differ
+            in number of frequencies.
+    """
+    if "_ij" not in dummyName:
+        raise InvalidDummyNameError(
+            "dummyName must contain '_ij' to replace with tensor indices."
+        )
+    readers = {
+        idx: iterScalar(fname, chunkSize, hartree)
+        for idx, fname in enumerate(tensorFiles(dummyName))
+        if archive.isfile(resolveFilename(fname))
+    }
+    if not readers:
+        raise TensorNotFoundError("No data for this tensor available.")
+    for chunks in itertools.zip_longest(*readers.values()):
+        if None in chunks or len({len(c[0]) for c in chunks}) != 1:
+            raise InvalidDataFileError(os.path.basename(dummyName))
+        freqs = chunks[0][0]
+        # NaN in both parts as for missing elements in readTensor
+        ten = np.full((9, len(freqs)), complex(np.nan, np.nan))
+        for idx, (_, field) in zip(readers, chunks):
+            ten[idx] = field
+        yield freqs, ten.reshape(3, 3, len(freqs))
+
+
+def readWindow(filename, wrange, hartree=True):
+    """Reads data points of scalar fields within a frequency window.
+
+    The file is parsed in bulk as in readScalar, the window is then located
+    via binary search on the sorted frequencies. Only copies of the data
+    points in the window are kept, the full arrays are freed right away.
+    Works for both column layouts. Use iterScalar to stream files that do not
+    fit into memory.
+
+    Args:
+        filename: Filename or full path of file to load.
+        wrange: Frequency window [wmin, wmax] in eV.
+        hartree: Indicates if frequencies from file need to be converted
+            from hartree to electron volts.
 
-        return freqs, field
+    Returns:
+        Tuple[freqs, field] with frequencies in eV and complex field data for
+        all data points with wmin <= freqs <= wmax.
 
+    Raises:
+        OSError: File cannot be found or opened.
+        InvalidDataFileError: File is in unknown format.
+    """
+    try:
+        freqs, field = _scalarField(
+            loadData(filename), filename, None, hartree
+        )
     except (ValueError, IndexError):
-        raise InvalidDataFileError(basename)
+        raise InvalidDataFileError(os.path.basename(filename))
+    start = np.searchsorted(freqs, wrange[0], side="left")
+    stop = np.searchsorted(freqs, wrange[1], side="right")
+    return freqs[start:stop].copy(), field[start:stop].copy()
+
+
+def tryReadWindow(filename, wrange, hartree=True, manifest=None):
+    """Wrapper for readWindow returning None for missing files."""
+    if manifest is not None and manifest.isMissing(filename):
+        return None
+    try:
+        return readWindow(filename, wrange, hartree)
+    except OSError:
+        return None
+
+
+def readTensorWindow(dummyName, wrange, hartree=True, workers=1):
+    """Reads complex tensor data within a frequency window.
+
+    Tensor version of readWindow, missing elements are filled with NaN as in
+    readTensor. Usually called via readTensor(..., wrange=[wmin, wmax]).
+
+    Args:
+        dummyName: Filename with _ij.OUT ending as dummy for _11.OUT etc.
+        wrange: Frequency window [wmin, wmax] in eV.
+        hartree: Indicates if frequencies from file are given in Hartree units
+            and need to be converted to electron volts.
+        workers: Number of threads used to read the element files.
+
+    Returns:
+        Tuple[freqs, tensor] with frequencies in eV and complex tensor data of
+        shape (3, 3, num_freqs) for all frequencies within the window.
+
+    Raises:
+        TensorNotFoundError: Not at least one tensor data file is loadable.
+        InvalidDataFileError: Element files have different frequency grids.
+    """
+    files = tensorFiles(dummyName)
+    return _readMatrixWindow(files, wrange, hartree, workers, (3, 3))
+
+
+def _readMatrixWindow(files, wrange, hartree, workers, shape, manifest=None):
+    """Implements readTensorWindow for arbitrary matrix shapes."""
+    read = functools.partial(
+        tryReadWindow, wrange=wrange, hartree=hartree, manifest=manifest
+    )
+    loads = mapConcurrently(read, files, workers)
+    present = [load for load in loads if load is not None]
+    if not present:
+        raise TensorNotFoundError("No data for this tensor available.")
+    freqs = grids.intern(present[0][0])
+    if not all(grids.sameGrid(load[0], freqs) for load in present):
+        raise InvalidDataFileError(os.path.basename(files[0]))
+    # NaN in both parts as for missing elements in readTensor
+    ten = np.full((len(files), len(freqs)), complex(np.nan, np.nan))
+    for idx, load in enumerate(loads):
+        if load is not None:
+            ten[idx] = load[1]
+    return freqs, ten.reshape(tuple(shape) + (len(freqs),))
+
+
+def _scalarFormat(threeColumn, prec):
+    """Returns numpy format string and file header used by scalar writers."""
+    version = elkoa.__version__
+    header = "Generated using ElkOpticsAnalyzer v{}".format(version)
+    if threeColumn:
+        fmt = "% 1.{p}E    % 1.{p}E    % 1.{p}E".format(p=prec)
+        header += "\n{:{w1}}{:{w2}}{:{w2}}".format(
+            "frequency",
+            "real part",
+            "imaginary part",
+            w1=prec + 10,
+            w2=prec + 11,
+        )
+    else:
+        fmt = "% 1.{p}E    % 1.{p}E".format(p=prec)
+        header += "\n{:{w1}}{:{w2}}".format(
+            "frequency", "field", w1=prec + 10, w2=prec + 11
+        )
+    return fmt, header
+
+
+# rows formatted at once by savetxt, bounds size of temporary strings
+_FORMAT_BLOCK_SIZE = 2 ** 16
+
+
+def savetxt(fd, array, fmt, header=""):
+    """Writes 2D array to binary file like np.savetxt, about 2x faster.
+
+    np.savetxt formats the array row by row in Python. Here, blocks of rows
+    are formatted with a single %-operation on the row format repeated for
+    each row, which yields byte-identical output including header, NaN and
+    signed zeros. This removes the per-row overhead only; converting the
+    numbers themselves takes the same time as before and dominates, see
+    benchmarkWriter in test/benchmark_io.py.
+
+    Args:
+        fd: File object opened in binary write mode.
+        array: 2D array with as many columns as fields in fmt.
+        fmt: Format string for a single row, e.g. "% 1.8E    % 1.8E".
+        header: Header written in front of data with "# " in front of each
+            of its lines, omitted if empty.
+    """
+    if header:
+        header = "# " + header.replace("\n", "\n# ") + "\n"
+        fd.write(header.encode("latin1"))
+    rowFormat = fmt + "\n"
+    for start in range(0, len(array), _FORMAT_BLOCK_SIZE):
+        stop = start + _FORMAT_BLOCK_SIZE
+        values = array[start:stop].ravel().tolist()
+        rows = len(values) // array.shape[1]
+        fd.write(((rowFormat * rows) % tuple(values)).encode("latin1"))
 
 
 def writeScalar(
@@ -229,7 +1351,8 @@ def writeScalar(
     """Generic write function for scalar fields.
 
     Args:
-        filename: Filename of output file.
+        filename: Filename of output file. Output is compressed on the fly
+            for filenames ending on .gz, .bz2 or .xz.
         freqs: Frequencies corresponding to field.
         field: Complex scalar field of the form ndarray(numfreqs).
         threeColumn: Indicates if output file should be in 3-column-style
@@ -239,42 +1362,61 @@ def writeScalar(
             volts to hartree units.
         prec: Precision of output data.
     """
-    version = elkoa.__version__
-    header = "Generated using ElkOpticsAnalyzer v{}".format(version)
+    fmt, header = _scalarFormat(threeColumn, prec)
     dim = len(freqs)
     if threeColumn:
-        fmt = "% 1.{p}E    % 1.{p}E    % 1.{p}E".format(p=prec)
-        header += "\n{:{w1}}{:{w2}}{:{w2}}".format(
-            "frequency",
-            "real part",
-            "imaginary part",
-            w1=prec + 10,
-            w2=prec + 11,
-        )
         array = np.zeros((dim, 3))
         array[:, 0] = freqs * 1 / hartreeInEv if hartree else freqs
         array[:, 1] = field.real
         array[:, 2] = field.imag
-        np.savetxt(filename, array, header=header, fmt=fmt)
+        with openFile(filename, "wb") as fd:
+            savetxt(fd, array, fmt, header)
     else:
-        fmt = "% 1.{p}E    % 1.{p}E".format(p=prec)
-        header += "\n{:{w1}}{:{w2}}".format(
-            "frequency", "field", w1=prec + 10, w2=prec + 11
-        )
         array = np.zeros((dim, 2))
         array[:, 0] = freqs * 1 / hartreeInEv if hartree else freqs
-        fd = open(filename, "wb")
+        fd = openFile(filename, "wb")
         # real part
         array[:, 1] = field.real
-        np.savetxt(fd, array, header=header, fmt=fmt)
+        savetxt(fd, array, fmt, header)
         # empty line in byte mode
         fd.write(b"\n")
         # imaginary part (stacked)
         array[:, 1] = field.imag
-        np.savetxt(fd, array, fmt=fmt)
+        savetxt(fd, array, fmt)
         fd.close()
 
 
+# number of files written at the same time by writeVector and writeTensor
+DEFAULT_WRITE_WORKERS = 4
+
+
+def _writeFiles(jobs, workers):
+    """Runs (filename, write) jobs concurrently, collecting errors per file.
+
+    Returns:
+        List of filenames in order of jobs if all of them were written.
+
+    Raises:
+        WriteError: Any of the jobs failed, all others still finished.
+    """
+
+    def run(job):
+        try:
+            job[1]()
+        except Exception as e:
+            return e
+        return None
+
+    results = mapConcurrently(run, jobs, workers)
+    errors = {
+        fname: e for (fname, _), e in zip(jobs, results) if e is not None
+    }
+    written = [fname for fname, _ in jobs if fname not in errors]
+    if errors:
+        raise WriteError(errors, written)
+    return written
+
+
 def writeVector(
     dummyName,
     freqs,
@@ -283,9 +1425,12 @@ def writeVector(
     threeColumn=False,
     hartree=True,
     prec=8,
+    workers=DEFAULT_WRITE_WORKERS,
 ):
     """Generic write function for vector fields.
 
+    Element files are written concurrently, see writeTensor.
+
     Args:
         dummyName: Output filename, e.g. E-field_i.dat, where i is replaced by
             1, 2, 3.
@@ -300,18 +1445,25 @@ def writeVector(
         hartree: Indicates if frequencies should be converted from electron
             volts to hartree units.
         prec: Precision of output data.
+        workers: Number of files formatted and written at the same time.
+
+    Returns:
+        List of written filenames.
 
     Raises:
         InvalidDummyNameError: dummyName does not contain substring "_i" that
             could be replaced by vector index.
+        WriteError: Some files could not be written, see its errors.
     """
     if "_i" not in dummyName:
         raise InvalidDummyNameError(
             "dummyName must contain '_i' to replace with vector index."
         )
+    jobs = []
     for i in elements:
         fname = dummyName.replace("_i", "_" + str(i))
-        writeScalar(
+        write = functools.partial(
+            writeScalar,
             fname,
             freqs,
             field[i - 1, i - 1],
@@ -319,6 +1471,8 @@ def writeVector(
             hartree=hartree,
             prec=prec,
         )
+        jobs.append((fname, write))
+    return _writeFiles(jobs, workers)
 
 
 def writeTensor(
@@ -329,9 +1483,14 @@ def writeTensor(
     threeColumn=False,
     hartree=True,
     prec=8,
+    workers=DEFAULT_WRITE_WORKERS,
 ):
     """Generic write function for tensor fields.
 
+    Element files are formatted and written concurrently by up to workers
+    threads, such that storage latency is paid once instead of per file.
+    Output is identical to writing them one after another.
+
     Args:
         dummyName: Output filename, e.g. epsilon_ij_test.dat, where ij is
             replaced by 11, 12, etc.
@@ -344,19 +1503,26 @@ def writeTensor(
         hartree: Indicates if frequencies should be converted from electron
             volts to hartree units.
         prec: Precision of output data.
+        workers: Number of files formatted and written at the same time.
+
+    Returns:
+        List of written filenames.
 
     Raises:
         InvalidDummyNameError: dummyName does not contain substring "_ij" that
             could be replaced by tensor indices.
+        WriteError: Some files could not be written, see its errors.
     """
     if "_ij" not in dummyName:
         raise InvalidDummyNameError(
             "dummyName must contain '_ij' to replace with tensor indices."
         )
+    jobs = []
     for idx in elements:
         i, j = [int(n) for n in str(idx)]
         fname = dummyName.replace("_ij", "_" + str(i) + str(j))
-        writeScalar(
+        write = functools.partial(
+            writeScalar,
             fname,
             freqs,
             field[i - 1, j - 1],
@@ -364,6 +1530,129 @@ def writeTensor(
             hartree=hartree,
             prec=prec,
         )
+        jobs.append((fname, write))
+    return _writeFiles(jobs, workers)
+
+
+class _ChunkWriter:
+    """Writes a scalar field chunk by chunk in the format of writeScalar.
+
+    For Elk style output, imaginary parts are buffered in a temporary file
+    and appended after the last real part when closing the writer, hence
+    memory usage is bounded by the chunk size.
+    """
+
+    def __init__(self, filename, threeColumn=False, hartree=True, prec=8):
+        self.threeColumn = threeColumn
+        self.hartree = hartree
+        self.fmt, self.header = _scalarFormat(threeColumn, prec)
+        self.file = openFile(filename, "wb")
+        self.imagFile = None if threeColumn else tempfile.TemporaryFile()
+
+    def write(self, freqs, field):
+        """Appends chunk of frequencies and field values to file."""
+        array = np.zeros((len(freqs), 3 if self.threeColumn else 2))
+        array[:, 0] = freqs * 1 / hartreeInEv if self.hartree else freqs
+        array[:, 1] = field.real
+        if self.threeColumn:
+            array[:, 2] = field.imag
+        # header only once in front of first chunk
+        savetxt(self.file, array, self.fmt, self.header)
+        self.header = ""
+        if not self.threeColumn:
+            array[:, 1] = field.imag
+            savetxt(self.imagFile, array, self.fmt)
+
+    def close(self):
+        """Appends buffered imaginary parts and closes all files."""
+        try:
+            if self.header:
+                # no chunks at all, write at least the header
+                self.write(np.empty(0), np.empty(0, dtype=np.complex_))
+            if not self.threeColumn:
+                # empty line in byte mode
+                self.file.write(b"\n")
+                self.imagFile.seek(0)
+                shutil.copyfileobj(self.imagFile, self.file)
+        finally:
+            self.file.close()
+            if self.imagFile is not None:
+                self.imagFile.close()
+
+
+def writeScalarChunks(
+    filename, chunks, threeColumn=False, hartree=True, prec=8
+):
+    """Write function for scalar fields given as chunks, e.g. by iterScalar.
+
+    Output files are identical to writeScalar for the concatenated chunks.
+
+    Args:
+        filename: Filename of output file.
+        chunks: Iterable of (freqs, field) tuples with field of the form
+            ndarray(len(freqs)).
+        threeColumn: Indicates if output file should be in 3-column-style
+            (frequencies, real part, imaginary part) or Elk style (real and
+            imaginary part stacked in 2 columns).
+        hartree: Indicates if frequencies should be converted from electron
+            volts to hartree units.
+        prec: Precision of output data.
+    """
+    writer = _ChunkWriter(filename, threeColumn, hartree, prec)
+    try:
+        for freqs, field in chunks:
+            writer.write(freqs, field)
+    finally:
+        writer.close()
+
+
+def writeTensorChunks(
+    dummyName,
+    chunks,
+    elements=[11, 12, 13, 21, 22, 23, 31, 32, 33],
+    threeColumn=False,
+    hartree=True,
+    prec=8,
+):
+    """Write function for tensor fields given as chunks, e.g. by iterTensor.
+
+    Output files are identical to writeTensor for the concatenated chunks.
+
+    Args:
+        dummyName: Output filename, e.g. epsilon_ij_test.dat, where ij is
+            replaced by 11, 12, etc.
+        chunks: Iterable of (freqs, field) tuples with field of the form
+            ndarray(3,3,len(freqs)).
+        elements: Array with indices of tensor elements to be written to file.
+        threeColumn: Indicates if output file should be in 3-column-style
+            (frequencies, real part, imaginary part) or Elk style (real and
+            imaginary part stacked in 2 columns).
+        hartree: Indicates if frequencies should be converted from electron
+            volts to hartree units.
+        prec: Precision of output data.
+
+    Raises:
+        InvalidDummyNameError: dummyName does not contain substring "_ij" that
+            could be replaced by tensor indices.
+    """
+    if "_ij" not in dummyName:
+        raise InvalidDummyNameError(
+            "dummyName must contain '_ij' to replace with tensor indices."
+        )
+    writers = {}
+    try:
+        for idx in elements:
+            i, j = [int(n) for n in str(idx)]
+            fname = dummyName.replace("_ij", "_" + str(i) + str(j))
+            writers[i - 1, j - 1] = _ChunkWriter(
+                fname, threeColumn, hartree, prec
+            )
+        for freqs, field in chunks:
+            for (i, j), writer in writers.items():
+                writer.write(freqs, field[i, j])
+    finally:
+        for writer in writers.values():
+            writer.close()
 
 
 # EOF - io.py
@@ -74,10 +74,10 @@ def isTensor(field):
 
 def checkStates(field):
     """Checks if certain tensor elements are completely NaN."""
-    numfreqs = field.shape[2]
-    nan = np.isnan(field).reshape(9, numfreqs)
+    # test element-wise, such that compact fields are never expanded
+    nan = [np.isnan(field[i, j]).all() for i in range(3) for j in range(3)]
     # Qt.PartiallyChecked == 1, Qt.Checked == 2
-    states = [1 if nan[i].all() else 2 for i in range(9)]
+    states = [1 if nan[i] else 2 for i in range(9)]
     return states
 
 
@@ -85,6 +85,9 @@ def convertFileNameToLatex(s, unit=True):
     """Tries to convert Elk output filenames into latex code."""
     # remove extension, e.g. "SIGMA_33.OUT" --> ['SIGMA_33', '.OUT']
     s, ext = os.path.splitext(s)
+    # same for compressed files, e.g. "SIGMA_33.OUT.gz"
+    if ext in [".gz", ".bz2", ".xz"]:
+        s, ext = os.path.splitext(s)
     # if possible, extract tensor indices of FIELD_??_XX, X in (1,2,3),
     # e.g. "EPSILON_TDDFT_12".split("_") --> ['EPSILON', 'TDDFT', '12']
     sub = s.split("_")[-1]
@@ -0,0 +1,225 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+from concurrent import futures
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import weakref
+
+import numpy as np
+
+from elkoa.utils import grids, io
+
+# shared memory blocks attached in this process by name; blocks are closed
+# lazily once all arrays using them have been deleted
+_attached = {}
+_released = []
+
+
+def _readerName(reader):
+    """Returns name of io reader, which can be looked up in any process."""
+    name = getattr(reader, "__name__", None)
+    if getattr(io, name or "", None) is not reader:
+        raise ValueError(
+            "[ERROR] reader must be a function of elkoa.utils.io!"
+        )
+    return name
+
+
+def _toShared(array):
+    """Copies array into new shared memory block and returns descriptor."""
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    target = np.frombuffer(shm.buf, array.dtype, array.size)
+    target[:] = array.ravel()
+    del target
+    shm.close()
+    return shm.name, array.shape, array.dtype.str
+
+
+def _readToShared(readerName, filename, options):
+    """Runs in worker process: reads file and moves result to shared memory.
+
+    Only the small descriptors and the content hashes of the parsed files
+    are pickled back to the parent process.
+    """
+    reader = getattr(io, readerName)
+    freqs, field = reader(filename, **options)
+    hashes = io.knownHashes(reader, filename, **options)
+    return (_toShared(freqs), _toShared(field)), hashes
+
+
+def _closeReleased():
+    """Closes shared memory blocks whose arrays have been deleted."""
+    while _released:
+        _attached.pop(_released.pop()).close()
+
+
+def _fromShared(descriptor):
+    """Attaches to shared memory block without copying its data.
+
+    The block's name is removed immediately, its memory is freed by the OS
+    when the last array using it is deleted in this process.
+    """
+    _closeReleased()
+    name, shape, dtype = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    shm.unlink()
+    _attached[name] = shm
+    dtype = np.dtype(dtype)
+    raw = np.frombuffer(shm.buf, dtype, int(np.prod(shape)))
+    # views of raw keep it alive, so raw is deleted after the last one
+    weakref.finalize(raw, _released.append, name)
+    return raw.reshape(shape)
+
+
+def _release(descriptor):
+    """Removes shared memory block that will never be attached."""
+    try:
+        shm = shared_memory.SharedMemory(name=descriptor[0])
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def createExecutor(processes=None):
+    """Creates process pool suitable for readFiles to reuse across calls.
+
+    Workers are started via forkserver, or spawn where not available, since
+    forking the threaded GUI process may deadlock in its children.
+    """
+    # workers must share our resource tracker, which otherwise complains
+    # about blocks created by workers, but unlinked by this process
+    resource_tracker.ensure_running()
+    methods = multiprocessing.get_all_start_methods()
+    method = "forkserver" if "forkserver" in methods else "spawn"
+    return futures.ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context(method)
+    )
+
+
+def _readInProcess(reader, filenames, returnExceptions, options):
+    """Serial fallback of readFiles without worker processes."""
+    results = []
+    for filename in filenames:
+        try:
+            results.append(reader(filename, **options))
+        except Exception as e:
+            if not returnExceptions:
+                raise
+            results.append(e)
+    return results
+
+
+def readFiles(
+    filenames,
+    reader=io.readScalar,
+    processes=None,
+    executor=None,
+    returnExceptions=False,
+    **options
+):
+    """Reads many files in worker processes with zero-copy result transfer.
+
+    Parsing text holds the GIL, hence threads only hide I/O latency. Here,
+    each file is parsed in a worker process by reader, which writes the
+    resulting arrays into multiprocessing.shared_memory blocks. The parent
+    process attaches to these blocks directly instead of unpickling copies
+    of large arrays. Parsing runs in parallel on multi-core machines, while
+    starting workers costs some time, hence reuse an executor for repeated
+    calls, see benchmark_io.benchmarkProcesses.
+
+    As for reads in this process, results of files with identical content
+    share the same read-only arrays, see io.shared. Files read before are
+    found without reading them again, all others are hashed by the workers
+    while parsing them.
+
+    Args:
+        filenames: List of filenames or _ij dummy names.
+        reader: Reader function of elkoa.utils.io, e.g. io.readScalar or
+            io.readTensor.
+        processes: Number of worker processes, defaults to number of CPUs.
+            For 1, files are read one after another in this process.
+        executor: Optional executor from createExecutor to reuse across
+            calls instead of starting new worker processes.
+        returnExceptions: If True, exceptions raised by reader are returned
+            in place of the results instead of being raised.
+        **options: Passed to reader, e.g. numFreqsTest or hartree.
+
+    Returns:
+        List of (freqs, field) tuples in order of filenames.
+    """
+    readerName = _readerName(reader)
+    if executor is None and processes == 1:
+        return _readInProcess(reader, filenames, returnExceptions, options)
+    # files read before in this process are looked up without reading them
+    keys = [io.sharedKey(reader, f, **options) for f in filenames]
+    results = [None if k is None else io.getShared(k) for k in keys]
+    ownExecutor = executor is None
+    if ownExecutor:
+        executor = createExecutor(processes)
+    jobs = {}
+    for idx, (filename, key) in enumerate(zip(filenames, keys)):
+        if results[idx] is not None:
+            continue
+        # files without key, e.g. missing ones, get their own job
+        jobKey = idx if key is None else key
+        if jobKey not in jobs:
+            jobs[jobKey] = filename, executor.submit(
+                _readToShared, readerName, filename, options
+            )
+    loads = {}
+    try:
+        for jobKey, (filename, job) in jobs.items():
+            try:
+                descriptors, hashes = job.result()
+            except Exception as e:
+                if not returnExceptions:
+                    raise
+                loads[jobKey] = e
+                continue
+            freqs, field = [_fromShared(d) for d in descriptors]
+            if isinstance(jobKey, int):
+                # identical grids are shared as for the readers in this process
+                loads[jobKey] = (grids.intern(freqs), field)
+                continue
+            # workers hash the files they parsed, results of files with
+            # identical content are shared as for reads in this process
+            io.recordHashes(hashes)
+            key = io.sharedKey(reader, filename, **options)
+            loads[jobKey] = io.storeShared(key, freqs, field)
+    finally:
+        # remove blocks of jobs that finished but won't be attached anymore
+        pending = [job for k, (_, job) in jobs.items() if k not in loads]
+        for job in pending:
+            job.cancel()
+        for job in pending:
+            if not job.cancelled() and job.exception() is None:
+                for descriptor in job.result()[0]:
+                    _release(descriptor)
+        if ownExecutor:
+            executor.shutdown()
+    for idx, key in enumerate(keys):
+        if results[idx] is None:
+            results[idx] = loads[idx if key is None else key]
+    return results
+
+
+# EOF - parallel.py
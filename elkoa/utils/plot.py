@@ -19,6 +19,7 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib import transforms
 
 
 class Plot:
@@ -62,7 +63,9 @@ class Plot:
         else:
             self._loc = location
 
-    def plotTensor(self, fig, freqs, ten, states, ylabel, style, vector=False):
+    def plotTensor(
+        self, fig, freqs, ten, states, ylabel, style, vector=False, xshift=0
+    ):
         """Plots real and imaginary parts of tensor fields.
 
         Creates two subplots and fills them with data from a tensorial field
@@ -81,6 +84,7 @@ class Plot:
             style: Character specifying horizontal split mode vs vertical.
             vector: Indicates if tensor field has only diagonal elements and
                 should be regarded as a vector field.
+            xshift: Value in eV the field is shifted by on x-axis, see shift.
 
         Returns:
             A tuple of two subplots containing the real and imaginary parts of
@@ -91,7 +95,8 @@ class Plot:
         ax1, ax2 = self.createSubPlots(fig, style)
 
         # restrict data according to plot range (for auto scaling to work)
-        mask = (freqs >= self.minw) & (freqs <= self.maxw)
+        window = self.window(freqs, xshift)
+        freqs = freqs[window]
 
         # use different line styles and markers in case curves are overlapping
         if vector:
@@ -99,7 +104,6 @@ class Plot:
             markers = [" ", " ", " "]
             colors = ["r", "g", "b"]
             elements = [11, 22, 33]
-            tenList = np.array([ten[0, 0, :], ten[1, 1, :], ten[2, 2, :]])
             states = [states[0], states[4], states[8]]
         else:
             styles = ["-", "-.", "-.", "-", ":", "-", ":", "-", "--"]
@@ -116,8 +120,8 @@ class Plot:
                 "k",
             ]
             elements = [11, 12, 13, 21, 22, 23, 31, 32, 33]
-            numfreqs = len(freqs)
-            tenList = ten.reshape(9, numfreqs)
+        # access elements one by one, e.g. for compact or mapped fields
+        tenList = [ten[e // 10 - 1, e % 10 - 1, window] for e in elements]
 
         for idxAx, ax in enumerate([ax1, ax2]):
             if ax is not None:
@@ -127,9 +131,9 @@ class Plot:
                         continue
                     # find correct value parts for current axis
                     if idxAx == 0:
-                        funValues = tenList[idx, :].real
+                        funValues = tenList[idx].real
                     else:
-                        funValues = tenList[idx, :].imag
+                        funValues = tenList[idx].imag
                     # prevent doublings when plotting "together"
                     if idxAx == 1 and style == "t":
                         label = None
@@ -137,13 +141,14 @@ class Plot:
                         label = elem // 10 if vector else elem
                     # create the plot
                     ax.plot(
-                        freqs[mask],
-                        funValues[mask],
+                        freqs,
+                        funValues,
                         label=label,
                         markevery=self.every,
                         color=colors[idx],
                         ls=styles[idx],
                         marker=markers[idx],
+                        transform=self.shift(ax, xshift),
                     )
                 ax.set_ylabel(ylabel)
                 ax.set_xlabel(r"$\omega$ [eV]")
@@ -154,13 +159,13 @@ class Plot:
 
         return ax1, ax2
 
-    def plotVector(self, fig, freqs, ten, states, ylabel, style):
+    def plotVector(self, fig, freqs, ten, states, ylabel, style, xshift=0):
         """Shortcut for plotTensor(*args, vector=True)."""
         return self.plotTensor(
-            fig, freqs, ten, states, ylabel, style, vector=True
+            fig, freqs, ten, states, ylabel, style, vector=True, xshift=xshift
         )
 
-    def plotScalar(self, fig, freqs, fun, ylabel, style):
+    def plotScalar(self, fig, freqs, fun, ylabel, style, xshift=0):
         """Plots real and imaginary parts of scalar fields.
 
         Creates two subplots and fills them with data from a scalar field f(w).
@@ -174,6 +179,7 @@ class Plot:
             fun: Scalar field containing optical data.
             ylabel: Label with physical name for the scalar field.
             style: Character specifying horizontal split mode vs verical.
+            xshift: Value in eV the field is shifted by on x-axis, see shift.
 
         Returns:
             A tuple of two subplots containing the real and imaginary parts of
@@ -184,15 +190,21 @@ class Plot:
         ax1, ax2 = self.createSubPlots(fig, style)
 
         # restrict data according to plot range (for auto scaling to work)
-        mask = (freqs >= self.minw) & (freqs <= self.maxw)
+        window = self.window(freqs, xshift)
+        freqs = freqs[window]
 
         # simplification for next for-loop: real -> axIdx 0, imag -> axIdx 1
-        funValues = [fun.real[mask], fun.imag[mask]]
+        funValues = [fun[window].real, fun[window].imag]
 
         # set labels, legend, additional lines etc.
         for idx, ax in enumerate([ax1, ax2]):
             if ax is not None:
-                ax.plot(freqs[mask], funValues[idx], "rg"[idx])
+                ax.plot(
+                    freqs,
+                    funValues[idx],
+                    "rg"[idx],
+                    transform=self.shift(ax, xshift),
+                )
                 ax.set_ylabel(ylabel)
                 ax.set_xlabel(r"$\omega$ [eV]")
                 ax.axvline(x=0.0, lw=1, color="b", ls="--")
@@ -218,7 +230,13 @@ class Plot:
             ax1.plot([], [], " ", label=parameter)
             for colId, d in enumerate(data):
                 label = d.notes[1]
-                ax1.plot(d.freqs, d.field.real, c=cmap[colId], label=label)
+                window = self.window(d.freqs)
+                ax1.plot(
+                    d.freqs[window],
+                    d.field[window].real,
+                    c=cmap[colId],
+                    label=label,
+                )
         # imaginary part
         if ax2 is not None:
             if style != "t":
@@ -226,7 +244,13 @@ class Plot:
             for colId, d in enumerate(data):
                 # prevent doublings when plotting "together"
                 label = None if (style == "t") else d.notes[1]
-                ax2.plot(d.freqs, d.field.imag, c=cmap[colId], label=label)
+                window = self.window(d.freqs)
+                ax2.plot(
+                    d.freqs[window],
+                    d.field[window].imag,
+                    c=cmap[colId],
+                    label=label,
+                )
         # stuff that need to be done only once for each axis
         for ax in [ax1, ax2]:
             if ax is not None:
@@ -238,6 +262,27 @@ class Plot:
                 ax.set_xlim([self.minw, self.maxw])
         return ax1, ax2
 
+    def window(self, freqs, xshift=0):
+        """Finds slice of sorted frequencies within [minw, maxw].
+
+        In contrast to a boolean mask, slicing keeps views into the field
+        data, such that only the visible part of memory-mapped fields needs
+        to be read from disk. Frequencies shifted by xshift are compared.
+        """
+        start = np.searchsorted(freqs, self.minw - xshift, side="left")
+        stop = np.searchsorted(freqs, self.maxw - xshift, side="right")
+        return slice(start, stop)
+
+    def shift(self, ax, xshift):
+        """Returns data transform of ax shifted by xshift on x-axis.
+
+        Shifting lazily during drawing keeps the (shared) frequency grid
+        untouched instead of creating a shifted copy on every redraw.
+        """
+        if xshift == 0:
+            return ax.transData
+        return transforms.Affine2D().translate(xshift, 0) + ax.transData
+
     def createSubPlots(self, fig, style):
         """Creates two subplots for a given figure.
 
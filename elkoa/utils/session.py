@@ -0,0 +1,142 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+
+import numpy as np
+
+from elkoa.utils import compact
+
+# version of the container layout written by save
+FORMAT_VERSION = 1
+# metadata of tab data objects stored alongside their arrays
+TAB_ATTRIBUTES = ["label", "filename", "notes", "states", "xshift", "isVector"]
+
+
+def _toJson(obj):
+    """Converts numpy scalars and arrays in metadata to JSON types."""
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError("Cannot store {} in session metadata.".format(type(obj)))
+
+
+def save(filename, tasks, tabNames, titles=None, compressed=False):
+    """Writes all tabs of one or more tasks into a single NPZ container.
+
+    Arrays are stored natively, i.e. without formatting any numbers, and
+    frequency grids shared by several tabs only once. Compact fields keep
+    only their existing elements. Metadata is stored as JSON string entry.
+
+    Args:
+        filename: Output filename, should end on .npz.
+        tasks: Dictionary mapping task names to lists of tab data objects
+            like TabData, i.e. with freqs, field and TAB_ATTRIBUTES.
+        tabNames: Dictionary mapping task names to lists of tab names.
+        titles: Optional dictionary mapping task names to display names.
+        compressed: Indicates if arrays should be zip-compressed.
+    """
+    arrays = {}
+    grids = {}
+    meta = {"version": FORMAT_VERSION, "tasks": []}
+    for taskIdx, (task, tabs) in enumerate(tasks.items()):
+        tabMeta = []
+        for tabIdx, tab in enumerate(tabs):
+            entry = {a: getattr(tab, a, None) for a in TAB_ATTRIBUTES}
+            if tab.freqs is not None:
+                # interned grids are shared by identity
+                key = grids.setdefault(
+                    id(tab.freqs), "grid{}".format(len(grids))
+                )
+                arrays[key] = tab.freqs
+                entry["freqs"] = key
+            field = tab.field
+            if field is not None:
+                key = "field{}_{}".format(taskIdx, tabIdx)
+                if isinstance(field, compact.CompactField):
+                    entry["elements"] = field.elements
+                    entry["kind"] = field.kind
+                    field = field.data
+                arrays[key] = field
+                entry["field"] = key
+            tabMeta.append(entry)
+        meta["tasks"].append(
+            {
+                "name": task,
+                "title": (titles or {}).get(task, task),
+                "tabNames": list(tabNames[task]),
+                "tabs": tabMeta,
+            }
+        )
+    arrays["meta"] = np.array(json.dumps(meta, default=_toJson))
+    writer = np.savez_compressed if compressed else np.savez
+    writer(filename, **arrays)
+
+
+def load(filename):
+    """Restores tasks written by save without parsing any text data.
+
+    Returns:
+        Tuple[tasks, tabNames, titles] of dictionaries keyed by task names
+        in the saved order. Tasks map to lists of dictionaries with keys
+        freqs, field and TAB_ATTRIBUTES. Tabs with equal frequency grids
+        share the same array.
+
+    Raises:
+        OSError: File cannot be found or opened.
+        ValueError: File is no session container of a supported version.
+    """
+    with np.load(filename, allow_pickle=False) as npz:
+        try:
+            meta = json.loads(str(npz["meta"]))
+        except KeyError as e:
+            raise ValueError(
+                "{} is no ElkOA session file.".format(filename)
+            ) from e
+        if meta.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(
+                "{} was written by a newer version of ElkOA.".format(filename)
+            )
+        grids = {}
+        tasks, tabNames, titles = {}, {}, {}
+        for task in meta["tasks"]:
+            name = task["name"]
+            tabs = []
+            for entry in task["tabs"]:
+                tab = {a: entry.get(a) for a in TAB_ATTRIBUTES}
+                tab["freqs"] = tab["field"] = None
+                if "freqs" in entry:
+                    key = entry["freqs"]
+                    if key not in grids:
+                        grids[key] = npz[key]
+                    tab["freqs"] = grids[key]
+                if "field" in entry:
+                    field = npz[entry["field"]]
+                    if "elements" in entry:
+                        field = compact.CompactField(
+                            entry["elements"], field, entry["kind"]
+                        )
+                    tab["field"] = field
+                tabs.append(tab)
+            tasks[name] = tabs
+            tabNames[name] = task["tabNames"]
+            titles[name] = task["title"]
+    return tasks, tabNames, titles
+
+
+# EOF - session.py
@@ -0,0 +1,107 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+import itertools
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+from elkoa.utils import compact
+
+# fields smaller than this (in MB) are kept in memory by default
+DEFAULT_MIN_SIZE = 64
+
+
+class FieldStore:
+    """Keeps large optical fields on disk as memory-mapped arrays.
+
+    Fields are written once to .npy files in a private directory and handed
+    back as copy-on-write memory maps, i.e. pages are only read from disk when
+    accessed, e.g. when plotting a restricted frequency range, and can be
+    dropped by the OS under memory pressure. In-place modifications only
+    affect the returned array, never the stored file.
+
+    Attributes:
+        path: Directory where mapped fields are stored.
+        minSize: Fields smaller than minSize MB are returned unchanged.
+    """
+
+    def __init__(self, path=None, minSize=DEFAULT_MIN_SIZE):
+        self.path = tempfile.mkdtemp(prefix="elkoa-", dir=path)
+        self.minSize = minSize
+        self._counter = itertools.count()
+        # remove directory latest when store gets garbage collected
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, self.path, ignore_errors=True
+        )
+
+    def put(self, field):
+        """Moves field to disk and returns memory-mapped array.
+
+        Args:
+            field: Array or compact field to be stored; None and small fields
+                are passed through unchanged.
+
+        Returns:
+            Copy-on-write (or read-only for read-only input) memory map with
+            same shape and dtype as field or field itself if it is not worth
+            being mapped.
+        """
+        if field is None or isinstance(field, np.memmap):
+            return field
+        # map only stored elements of compact fields
+        if isinstance(field, compact.CompactField):
+            data = self.put(field.data)
+            if data is field.data:
+                return field
+            return compact.CompactField(field.elements, data, field.kind)
+        field = np.asarray(field)
+        if field.nbytes < self.minSize * 1024 ** 2:
+            return field
+        filename = os.path.join(
+            self.path, "field{}.npy".format(next(self._counter))
+        )
+        try:
+            np.save(filename, field)
+        except OSError as e:
+            print("[WARNING] Could not map field to disk:", e)
+            return field
+        # read-only fields, e.g. shared ones, stay read-only
+        return np.load(
+            filename, mmap_mode="c" if field.flags.writeable else "r"
+        )
+
+    def clear(self):
+        """Removes all stored fields; existing maps stay valid on POSIX."""
+        for name in os.listdir(self.path):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                # file still mapped on Windows, will be removed on close()
+                pass
+
+    def close(self):
+        """Removes store directory including all stored fields."""
+        self._finalizer()
+
+
+# EOF - store.py
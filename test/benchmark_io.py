@@ -0,0 +1,250 @@
+# coding: utf-8
+# vim: set ai ts=4 sw=4 sts=0 noet pi ci
+
+# Copyright © 2019 René Wirnata.
+# This file is part of Elk Optics Analyzer (ElkOA).
+#
+# Elk Optics Analyzer (ElkOA) is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at your
+# option) any later version.
+#
+# Elk Optics Analyzer (ElkOA) is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Elk Optics Analyzer. If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmarks for performance critical parts of elkoa.utils.io.
+
+Run directly via `python benchmark_io.py [numfreqs]`, not collected by pytest.
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+from elkoa.utils import io, parallel
+
+
+def separatePartsLoop(array, num, threeColumn):
+    """Former element-wise implementation of io.separateParts."""
+    if threeColumn:
+        array = np.asarray(array).reshape(3, 3, num, 3)
+        real = array[:, :, :, 1]
+        imag = array[:, :, :, 2]
+    else:
+        array = np.asarray(array).reshape(3, 3, 2 * num, 2)
+        real = array[:, :, :num, 1]
+        imag = array[:, :, num:, 1]
+    ten = np.zeros(real.shape, dtype=np.complex_)
+    for i in range(num):
+        ten[:, :, i] = real[:, :, i] + imag[:, :, i] * 1j
+    return ten
+
+
+def createRawData(num, threeColumn):
+    """Creates random raw data as read from 9 tensor element files."""
+    freqs = np.linspace(0, 1, num)
+    if threeColumn:
+        raw = np.random.randn(9, num, 3)
+        raw[:, :, 0] = freqs
+    else:
+        raw = np.random.randn(9, 2 * num, 2)
+        raw[:, :num, 0] = raw[:, num:, 0] = freqs
+    # include some signed zeros and missing elements for bit-identity checks
+    raw[0, :10, 1:] = -0.0
+    raw[3] = np.nan
+    return raw
+
+
+def benchmarkSeparateParts(num=100000, repeat=5):
+    """Compares io.separateParts against the former loop implementation."""
+    print("--- separateParts, numfreqs = {} ---".format(num))
+    for threeColumn in [False, True]:
+        raw = createRawData(num, threeColumn)
+        new = io.separateParts(raw, num, threeColumn)
+        old = separatePartsLoop(raw, num, threeColumn)
+        # compare raw bytes, not values, to also catch signed zeros and NaN
+        identical = new.tobytes() == old.tobytes()
+        tNew = min(
+            timeit.repeat(
+                lambda: io.separateParts(raw, num, threeColumn),
+                number=1,
+                repeat=repeat,
+            )
+        )
+        tOld = min(
+            timeit.repeat(
+                lambda: separatePartsLoop(raw, num, threeColumn),
+                number=1,
+                repeat=repeat,
+            )
+        )
+        print(
+            "{:>8}: loop {:8.2f} ms | vectorized {:8.2f} ms | "
+            "speedup {:6.1f}x | bit-identical: {}".format(
+                "3-column" if threeColumn else "Elk",
+                tOld * 1e3,
+                tNew * 1e3,
+                tOld / tNew,
+                identical,
+            )
+        )
+
+
+def benchmarkParser(num=100000, repeat=5):
+    """Compares io.loadData against np.loadtxt on Elk style files.
+
+    Plain files are parsed by np.loadtxt directly, hence both should take
+    the same time. Fortran formatted files need a second, sanitized pass.
+    """
+    print("--- loadData, numfreqs = {} ---".format(num))
+    freqs = np.linspace(0, 1, num)
+    field = np.random.randn(num) + np.random.randn(num) * 1j
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, "EPSILON_11.OUT")
+        io.writeScalar(fname, freqs, field, prec=10)
+        identical = np.array_equal(io.loadData(fname), np.loadtxt(fname))
+        tNew = min(
+            timeit.repeat(lambda: io.loadData(fname), number=1, repeat=repeat)
+        )
+        tOld = min(
+            timeit.repeat(lambda: np.loadtxt(fname), number=1, repeat=repeat)
+        )
+        # Fortran double precision exponents as in 1.0D-03
+        fortran = os.path.join(tmp, "EPSILON_22.OUT")
+        with open(fname, "rb") as src, open(fortran, "wb") as dst:
+            dst.write(src.read().replace(b"E", b"D"))
+        tFortran = min(
+            timeit.repeat(
+                lambda: io.loadData(fortran), number=1, repeat=repeat
+            )
+        )
+    print(
+        "     Elk: loadtxt {:8.2f} ms | loadData {:8.2f} ms | "
+        "ratio {:6.2f}x | identical: {}".format(
+            tOld * 1e3, tNew * 1e3, tOld / tNew, identical
+        )
+    )
+    print("   D-exp: loadData {:8.2f} ms".format(tFortran * 1e3))
+
+
+def writeScalarSavetxt(filename, freqs, field, threeColumn=False, prec=8):
+    """Former np.savetxt based implementation of io.writeScalar."""
+    fmt, header = io._scalarFormat(threeColumn, prec)
+    freqs = freqs / io.hartreeInEv
+    with open(filename, "wb") as fd:
+        if threeColumn:
+            array = np.column_stack([freqs, field.real, field.imag])
+            np.savetxt(fd, array, header=header, fmt=fmt)
+        else:
+            array = np.column_stack([freqs, field.real])
+            np.savetxt(fd, array, header=header, fmt=fmt)
+            fd.write(b"\n")
+            array[:, 1] = field.imag
+            np.savetxt(fd, array, fmt=fmt)
+
+
+def benchmarkWriter(num=100000, repeat=5):
+    """Compares io.writeScalar against the former np.savetxt version."""
+    print("--- writeScalar, numfreqs = {} ---".format(num))
+    freqs = np.linspace(0, 1, num)
+    field = np.random.randn(num) + np.random.randn(num) * 1j
+    field[:10] = complex(np.nan, -0.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        new = os.path.join(tmp, "new.OUT")
+        old = os.path.join(tmp, "old.OUT")
+        for threeColumn in [False, True]:
+            io.writeScalar(new, freqs, field, threeColumn)
+            writeScalarSavetxt(old, freqs, field, threeColumn)
+            with open(new, "rb") as f1, open(old, "rb") as f2:
+                identical = f1.read() == f2.read()
+            tNew = min(
+                timeit.repeat(
+                    lambda: io.writeScalar(new, freqs, field, threeColumn),
+                    number=1,
+                    repeat=repeat,
+                )
+            )
+            tOld = min(
+                timeit.repeat(
+                    lambda: writeScalarSavetxt(old, freqs, field, threeColumn),
+                    number=1,
+                    repeat=repeat,
+                )
+            )
+            print(
+                "{:>8}: savetxt {:8.2f} ms | bulk {:8.2f} ms | "
+                "speedup {:6.1f}x | byte-identical: {}".format(
+                    "3-column" if threeColumn else "Elk",
+                    tOld * 1e3,
+                    tNew * 1e3,
+                    tOld / tNew,
+                    identical,
+                )
+            )
+
+
+def benchmarkProcesses(num=100000, numFiles=16, repeat=3):
+    """Compares parallel.readFiles in worker processes against serial reads.
+
+    Files have distinct content, hence none of them is shared. Caches are
+    cleared before each run, such that all files are parsed again.
+    """
+    print(
+        "--- readFiles, numfreqs = {}, files = {}, cores = {} ---".format(
+            num, numFiles, os.cpu_count()
+        )
+    )
+    freqs = np.linspace(0, 1, num)
+    with tempfile.TemporaryDirectory() as tmp:
+        fnames = []
+        for i in range(numFiles):
+            fname = os.path.join(tmp, "EPSILON_{:03d}.OUT".format(i))
+            field = np.random.randn(num) + np.random.randn(num) * 1j
+            io.writeScalar(fname, freqs, field)
+            fnames.append(fname)
+
+        def read(**kwargs):
+            io._shared.clear()
+            io._contentHashes.clear()
+            return parallel.readFiles(fnames, io.readScalar, **kwargs)
+
+        tSerial = min(
+            timeit.repeat(lambda: read(processes=1), number=1, repeat=repeat)
+        )
+        executor = parallel.createExecutor()
+        try:
+            # start all workers before timing
+            read(executor=executor)
+            tPool = min(
+                timeit.repeat(
+                    lambda: read(executor=executor), number=1, repeat=repeat
+                )
+            )
+        finally:
+            executor.shutdown()
+        tStart = min(timeit.repeat(lambda: read(), number=1, repeat=repeat))
+    print(
+        "  serial {:8.2f} ms | reused pool {:8.2f} ms | new pool {:8.2f} ms"
+        " | speedup {:6.2f}x".format(
+            tSerial * 1e3, tPool * 1e3, tStart * 1e3, tSerial / tPool
+        )
+    )
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    benchmarkSeparateParts(num)
+    benchmarkParser(num)
+    benchmarkWriter(num)
+    benchmarkProcesses(num)
+
+
+# EOF - benchmark_io.py
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def tensor():
+    """Creates a random complex tensor field and matching frequencies."""
+    num = 50
+    freqs = np.linspace(0, 10, num)
+    field = np.random.randn(3, 3, num) + np.random.randn(3, 3, num) * 1j
+    return freqs, field
+
+
+# EOF - conftest.py
@@ -0,0 +1,64 @@
+import asyncio
+import functools
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from elkoa.utils import aio, io
+
+
+def test_read_folders(tmp_path):
+    """Tests that all folders are read and yielded once."""
+    freqs = np.linspace(0, 10, 20)
+    folders = []
+    for idx in range(5):
+        folder = tmp_path / str(idx)
+        folder.mkdir()
+        io.writeScalar(str(folder / "EELS.OUT"), freqs, freqs * idx + 1j)
+        folders.append(str(folder))
+
+    async def collect():
+        reader = functools.partial(io.readScalar, hartree=False)
+        return [r async for r in aio.readFolders(folders, "EELS.OUT", reader)]
+
+    results = dict(asyncio.run(collect()))
+    assert sorted(results) == folders
+    for idx, folder in enumerate(folders):
+        np.testing.assert_allclose(results[folder][1].real, freqs * idx)
+
+
+def test_as_completed_order_and_bound():
+    """Tests completion order, bounded concurrency and error handling."""
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def load(delay):
+        with lock:
+            running.append(delay)
+            peak.append(len(running))
+        time.sleep(delay)
+        with lock:
+            running.remove(delay)
+        if delay == 0:
+            raise ValueError("broken folder")
+        return delay
+
+    async def collect(returnExceptions):
+        gen = aio.asCompleted(
+            [0.2, 0.05, 0.1, 0], load, 2, returnExceptions=returnExceptions
+        )
+        return [r async for r in gen]
+
+    results = asyncio.run(collect(True))
+    assert max(peak) <= 2
+    assert [item for item, _ in results] != [0.2, 0.05, 0.1, 0]
+    assert isinstance(dict(results)[0], ValueError)
+    assert dict(results)[0.1] == 0.1
+    with pytest.raises(ValueError):
+        asyncio.run(collect(False))
+
+
+# EOF - test_aio.py
@@ -0,0 +1,112 @@
+import os
+import tarfile
+import zipfile
+
+import numpy as np
+import pytest
+
+from elkoa.utils import archive, cache, elk, io
+
+ELK_IN = "wplot\n  100 100 0 : nwplot, ngrkf, nswplot\n  0.0 1.0\n\n"
+LATTICE = (
+    "vector a1 : 1.0 0.0 0.0\nvector a2 : 0.0 2.0 0.0\n"
+    "vector a3 : 0.0 0.0 3.0\n"
+)
+
+
+@pytest.fixture
+def study(tmp_path, tensor):
+    """Writes two calculation folders of a parameter study to disk."""
+    freqs, field = tensor
+    root = tmp_path / "study"
+    for idx in range(2):
+        folder = root / "scan{}".format(idx)
+        folder.mkdir(parents=True)
+        (folder / "elk.in").write_text(ELK_IN)
+        (folder / "LATTICE.OUT").write_text(LATTICE)
+        io.writeTensor(
+            str(folder / "EPSILON_ij.OUT"), freqs, field * (idx + 1), [11, 22]
+        )
+        io.writeScalar(str(folder / "EELS.OUT"), freqs, field[0, 0])
+    return root
+
+
+def makeArchive(root, ext):
+    """Packs folder root into archive with extension ext next to it."""
+    filename = str(root) + ext
+    if ext == ".zip":
+        with zipfile.ZipFile(filename, "w") as zf:
+            for path in sorted(root.rglob("*")):
+                zf.write(path, os.path.relpath(path, root.parent))
+    else:
+        mode = {".tar": "w", ".tar.gz": "w:gz", ".tar.xz": "w:xz"}[ext]
+        with tarfile.open(filename, mode) as tf:
+            tf.add(str(root), arcname="./" + root.name)
+    return filename
+
+
+@pytest.mark.parametrize("ext", [".tar", ".tar.gz", ".tar.xz", ".zip"])
+def test_archive_read(study, ext):
+    """Tests reading data and input files directly from archives."""
+    filename = makeArchive(study, ext)
+    folder = os.path.join(filename, "study", "scan1")
+    assert archive.isMember(folder) and archive.isdir(folder)
+    assert archive.findFolders(filename) == [
+        os.path.join(filename, "study", "scan0"),
+        folder,
+    ]
+    assert archive.isfile(os.path.join(folder, "EELS.OUT"))
+    assert not archive.exists(os.path.join(folder, "EPSILON_12.OUT"))
+    manifest = io.Manifest(folder)
+    assert "elk.in" in manifest.names
+    dummy = os.path.join(folder, "EPSILON_ij.OUT")
+    rfreqs, rfield = io.readTensor(dummy, manifest=manifest)
+    freqs, field = io.readTensor(str(study / "scan1" / "EPSILON_ij.OUT"))
+    np.testing.assert_array_equal(rfreqs, freqs)
+    np.testing.assert_array_equal(rfield, field)
+    chunks = list(io.iterScalar(os.path.join(folder, "EELS.OUT"), 7))
+    assert sum(len(c[0]) for c in chunks) == len(freqs)
+    assert elk.readElkInputParameter("wplot", path=folder)[0] == 100
+    np.testing.assert_array_equal(
+        elk.readElkLattice(folder), np.diag([1.0, 2.0, 3.0])
+    )
+    with pytest.raises(FileNotFoundError):
+        io.readScalar(os.path.join(folder, "missing.OUT"))
+
+
+def test_archive_index_reuse(study):
+    """Tests that the member index is built once per archive state."""
+    filename = makeArchive(study, ".tar.gz")
+    index = archive.getIndex(filename)
+    assert archive.getIndex(filename) is index
+    # cache entries of members are invalidated by rewriting the archive
+    stamp = cache.fileStamp(
+        os.path.join(filename, "study", "scan0", "EELS.OUT")
+    )
+    assert stamp[2] == index.stamp[1]
+    os.utime(filename, ns=(0, 0))
+    assert archive.getIndex(filename) is not index
+
+
+def test_archive_lazy(study, monkeypatch):
+    """Tests that compressed tar members are decompressed per folder."""
+    filename = makeArchive(study, ".tar.xz")
+    index = archive.ArchiveIndex(filename)
+    assert not index._cache
+    member = "study/scan1/elk.in"
+    with index.open(member) as f:
+        f.seek(5)
+        assert f.read() == ELK_IN.encode()[5:]
+    # only files of the requested folder are kept
+    assert member in index._cache
+    assert all(n.startswith("study/scan1/") for n in index._cache)
+    # least recently used members are dropped beyond the cache size
+    monkeypatch.setattr(archive, "MEMBER_CACHE_SIZE", len(ELK_IN))
+    index._cache.clear()
+    index._cacheSize = 0
+    with index.open("study/scan0/elk.in") as f:
+        assert f.read() == ELK_IN.encode()
+    assert list(index._cache) == ["study/scan0/elk.in"]
+
+
+# EOF - test_archive.py
@@ -0,0 +1,68 @@
+import types
+
+import numpy as np
+import pytest
+
+from elkoa.utils import columnar, compact
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def tabs():
+    """Creates batch-like scalar tabs plus a tensor with missing element."""
+    freqs = np.linspace(0, 10, 50)
+    ten = np.random.randn(3, 3, 50) + np.random.randn(3, 3, 50) * 1j
+    ten[0, 1] = np.nan
+    tabs = [
+        types.SimpleNamespace(
+            freqs=freqs,
+            field=ten[0, 0] * idx,
+            label="loss",
+            filename="scan{}/EELS.OUT".format(idx),
+            notes=["swidth", str(idx)],
+        )
+        for idx in range(3)
+    ]
+    tabs.append(
+        types.SimpleNamespace(
+            freqs=freqs,
+            field=compact.compress(ten),
+            label="eps",
+            filename="EPSILON_ij.OUT",
+            notes=None,
+        )
+    )
+    return tabs
+
+
+@pytest.mark.parametrize("ext", [".arrow", ".parquet"])
+@pytest.mark.parametrize("dtype", columnar.DTYPES)
+def test_columnar_roundtrip(tmp_path, tabs, ext, dtype):
+    """Tests that all tabs end up in one table with the chosen precision."""
+    fname = str(tmp_path / ("study" + ext))
+    columnar.write(fname, tabs, dtype)
+    table = columnar.read(fname)
+    assert table.num_rows == 4 * 50
+    assert table.schema.field("frequency").type == pa.from_numpy_dtype(dtype)
+    assert "real_12" not in table.column_names
+    rtol = 1e-6 if dtype == "float32" else 0
+    for idx, tab in enumerate(tabs):
+        rows = np.flatnonzero(table.column("tab").to_numpy() == idx)
+        sub = table.take(pa.array(rows))
+        np.testing.assert_allclose(
+            sub.column("frequency").to_numpy(), tab.freqs, rtol=rtol
+        )
+        if idx < 3:
+            assert set(sub.column("value").to_pylist()) == {str(idx)}
+            real = sub.column("real").to_numpy()
+            np.testing.assert_allclose(real, tab.field.real, rtol=rtol)
+        else:
+            assert np.isnan(sub.column("real").to_numpy()).all()
+            imag = sub.column("imag_23").to_numpy()
+            np.testing.assert_allclose(imag, tab.field[1, 2].imag, rtol=rtol)
+    with pytest.raises(ValueError):
+        columnar.toTable(tabs, "int32")
+
+
+# EOF - test_columnar.py
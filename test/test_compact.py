@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from elkoa.utils import compact, convert, misc, store
+
+
+@pytest.fixture
+def tensor():
+    """Creates a random complex tensor field."""
+    return np.random.randn(3, 3, 40) + np.random.randn(3, 3, 40) * 1j
+
+
+@pytest.mark.parametrize(
+    "present, kind",
+    [
+        ([(0, 0), (1, 1), (2, 2)], "diagonal"),
+        ([(0, 0), (1, 2), (2, 2)], "sparse"),
+        ([], "sparse"),
+    ],
+)
+def test_compact_from_array(tensor, present, kind):
+    """Tests that compact fields behave like their (3, 3, N) arrays."""
+    ten = np.full_like(tensor, complex(np.nan, np.nan))
+    for i, j in present:
+        ten[i, j] = tensor[i, j]
+    field = compact.CompactField.fromArray(ten)
+    assert field.kind == kind
+    assert field.shape == ten.shape
+    assert field.nbytes == len(present) * ten.nbytes // 9
+    np.testing.assert_array_equal(np.asarray(field), ten)
+    np.testing.assert_array_equal(field[1, 2, 5:10], ten[1, 2, 5:10])
+    np.testing.assert_array_equal(field[:, 0], ten[:, 0])
+    assert misc.checkStates(field) == misc.checkStates(ten)
+    with pytest.raises(IndexError):
+        field[3, 0]
+
+
+def test_compact_symmetric(tensor):
+    """Tests that symmetric tensors store only 6 elements."""
+    ten = tensor + tensor.transpose(1, 0, 2)
+    field = compact.compress(ten)
+    assert field.kind == "symmetric"
+    assert len(field.elements) == 6
+    np.testing.assert_array_equal(field[2, 0], ten[2, 0])
+    np.testing.assert_array_equal(np.asarray(field), ten)
+    # complete, non-symmetric tensors are not worth compressing
+    assert compact.compress(tensor) is tensor
+    # also if only the last frequency breaks the symmetry
+    ten[1, 2, -1] += 1
+    assert compact.compress(ten) is ten
+
+
+def test_compact_refractive_index(tmp_path):
+    """Tests that refractive index converter returns compact vectors."""
+    freqs = np.linspace(0.1, 10, 50)
+    eps = np.tile(np.identity(3)[:, :, None], 50) * (2 + 0.1j)
+    converter = convert.Converter(
+        q=[0, 0, 1], B=np.identity(3), freqs=freqs, eta=0.01
+    )
+    refInd, polv1, eL1, polv2, eL2 = converter.eps_to_refIndAndPolVec(eps)
+    assert refInd.elements == ((0, 0), (1, 1))
+    assert polv1.nbytes == eps.nbytes // 3
+    np.testing.assert_allclose(refInd[0, 0], np.sqrt(2 + 0.1j))
+    assert misc.checkStates(refInd) == [2, 1, 1, 1, 2, 1, 1, 1, 1]
+    # stored fields keep their compact form
+    fs = store.FieldStore(str(tmp_path), minSize=0)
+    mapped = fs.put(polv1)
+    assert isinstance(mapped.data, np.memmap)
+    np.testing.assert_array_equal(mapped[2, 2], polv1[2, 2])
+    fs.close()
+
+
+# EOF - test_compact.py
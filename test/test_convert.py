@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from elkoa.utils import convert
+
+
+def test_convert_chunks():
+    """Tests that chunk-wise conversion equals conversion of whole field."""
+    freqs = np.linspace(0.1, 10, 100)
+    eps = np.random.randn(3, 3, 100) + np.random.randn(3, 3, 100) * 1j
+    converter = convert.Converter(
+        q=[0, 0, 0], B=np.identity(3), freqs=freqs, eta=0.01
+    )
+    chunks = list(zip(np.array_split(freqs, 4), np.array_split(eps, 4, 2)))
+    output = converter.convertChunks("eps_to_sig", chunks)
+    sig = np.concatenate([out for _, out in output], axis=2)
+    np.testing.assert_allclose(converter.freqs, freqs)
+    np.testing.assert_allclose(sig, converter.eps_to_sig(eps))
+    with pytest.raises(ValueError):
+        next(converter.convertChunks("eps_to_refInd", chunks))
+
+
+# EOF - test_convert.py
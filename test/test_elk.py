@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from elkoa.utils import elk
+
+ELK_IN = """! GaAs optics
+tasks
+  0
+  121    : RPA dielectric tensor
+
+wplot   : frequency grid
+  500 100 0 : nwplot, ngrkf, nswplot
+  0.0 1.0d0
+! comment inside block
+  ! indented comment
+
+swidth
+  0.005
+
+tetra
+ .true.
+
+vecql
+  0.0 0.0 -0.25
+
+sppath
+  '../../species/'
+"""
+LATTICE = (
+    "vector a1 : 1.0 0.0 0.0\nvector a2 : 0.0 2.0 0.0\n"
+    "vector a3 : 0.0 0.0 3.0"
+)
+
+
+@pytest.fixture
+def elkFolder(tmp_path):
+    """Creates calculation folder with elk.in and LATTICE.OUT."""
+    (tmp_path / "elk.in").write_text(ELK_IN)
+    (tmp_path / "LATTICE.OUT").write_text(LATTICE)
+    return tmp_path
+
+
+def test_parse_elk_input(elkFolder):
+    """Tests parsing all blocks at once including comments and logicals."""
+    blocks = elk.parseElkInput(str(elkFolder))
+    assert blocks == {
+        "tasks": [0, 121],
+        "wplot": [500, 100, 0, 0.0, 1.0],
+        "swidth": 0.005,
+        "tetra": True,
+        "vecql": [0.0, 0.0, -0.25],
+        "sppath": "'../../species/'",
+    }
+    assert elk.readElkInputParameter("swidth", str(elkFolder)) == 0.005
+    with pytest.raises(NameError):
+        elk.readElkInputParameter("nempty", str(elkFolder))
+    # results are cached until elk.in changes
+    value = elk.readElkInputParameter("tasks", str(elkFolder))
+    value.append(1)
+    assert elk.parseElkInput(str(elkFolder))["tasks"] == [0, 121]
+    (elkFolder / "elk.in").write_text(ELK_IN.replace("0.005", "0.01"))
+    os.utime(elkFolder / "elk.in", ns=(0, 0))
+    assert elk.readElkInputParameter("swidth", str(elkFolder)) == 0.01
+
+
+def test_parse_blocks_without_blank_lines(tmp_path):
+    """Tests that block names end the previous block as in Elk."""
+    (tmp_path / "elk.in").write_text(
+        "ngridk\n 8 8 8\nwplot\n 800 100 0\n 0.0 1.5\n"
+        "spinpol\n T\nsppath\n 'species/'\n"
+    )
+    blocks = elk.parseElkInput(str(tmp_path))
+    assert blocks["ngridk"] == [8, 8, 8]
+    assert blocks["wplot"] == [800, 100, 0, 0.0, 1.5]
+    assert blocks["spinpol"] == "T"
+    assert blocks["sppath"] == "'species/'"
+
+
+def test_elk_input_path(elkFolder, tmp_path_factory, monkeypatch):
+    """Tests that ElkInput reads elk.in from its path, not from cwd."""
+    monkeypatch.chdir(tmp_path_factory.mktemp("elsewhere"))
+    elkInput = elk.ElkInput(path=str(elkFolder))
+    assert elkInput.numfreqs == 500
+    assert elkInput.swidth == 0.005
+    assert list(elkInput.q_frac) == [0.0, 0.0, -0.25]
+
+
+def test_get_elk_input_cache(elkFolder):
+    """Tests that ElkInput instances are shared until input files change."""
+    first = elk.getElkInput(str(elkFolder))
+    assert elk.getElkInput(str(elkFolder) + "/") is first
+    (elkFolder / "LATTICE.OUT").write_text(LATTICE.replace("3.0", "4.0"))
+    os.utime(elkFolder / "LATTICE.OUT", ns=(0, 0))
+    second = elk.getElkInput(str(elkFolder))
+    assert second is not first
+    assert abs(second.avol - 8.0) < 1e-12
+    assert elk.getElkInput(str(elkFolder)) is second
+
+
+# EOF - test_elk.py
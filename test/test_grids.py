@@ -0,0 +1,50 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from elkoa.utils import grids, io, plot  # noqa: E402
+
+
+def test_intern():
+    """Tests that equal grids are held once and compared by identity."""
+    freqs = np.linspace(0, 10, 100)
+    grid = grids.intern(freqs)
+    assert grid is not freqs and not grid.flags.writeable
+    assert grids.intern(freqs.copy()) is grid
+    assert grids.intern(grid) is grid
+    assert grids.sameGrid(grid, freqs.copy())
+    assert not grids.sameGrid(grid, freqs + 1)
+    assert not grids.sameGrid(grid, None)
+    assert grids.intern(None) is None
+
+
+def test_readers_share_grids(tmp_path):
+    """Tests that files with different data on same grid share freqs."""
+    freqs = np.linspace(0, 10, 50)
+    field = np.random.randn(2, 50) + np.random.randn(2, 50) * 1j
+    io.writeScalar(str(tmp_path / "A.OUT"), freqs, field[0])
+    io.writeScalar(str(tmp_path / "B.OUT"), freqs, field[1])
+    fa, _ = io.readScalar(str(tmp_path / "A.OUT"))
+    fb, _ = io.readScalar(str(tmp_path / "B.OUT"))
+    assert fa is fb
+
+
+def test_lazy_shift():
+    """Tests that x-shifted plots neither copy nor modify frequencies."""
+    freqs = grids.intern(np.linspace(0, 10, 101))
+    fun = np.exp(1j * freqs)
+    plotter = plot.Plot(minw=2, maxw=5)
+    fig = plt.figure()
+    ax1, _ = plotter.plotScalar(fig, freqs, fun, "f", "h", xshift=1.5)
+    line = ax1.get_lines()[0]
+    # only data with shifted frequencies in [minw, maxw] is plotted
+    np.testing.assert_allclose(line.get_xdata()[[0, -1]], [0.5, 3.5])
+    xy = line.get_transform().transform([[0.5, 0]])
+    np.testing.assert_allclose(xy, ax1.transData.transform([[2, 0]]))
+    plt.close(fig)
+
+
+# EOF - test_grids.py
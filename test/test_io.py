@@ -0,0 +1,391 @@
+import os
+
+import numpy as np
+import pytest
+
+from elkoa.utils import cache, io
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("threeColumn", [False, True])
+def test_tensor_roundtrip(tmp_path, tensor, threeColumn, workers):
+    """Tests writing and reading tensors with missing elements."""
+    freqs, field = tensor
+    dummy = str(tmp_path / "EPSILON_ij.OUT")
+    elements = [11, 22, 23, 33]
+    io.writeTensor(
+        dummy, freqs, field, elements, threeColumn=threeColumn, prec=16
+    )
+    rfreqs, rfield = io.readTensor(dummy, workers=workers)
+    np.testing.assert_allclose(rfreqs, freqs)
+    for idx, e in enumerate([11, 12, 13, 21, 22, 23, 31, 32, 33]):
+        i, j = idx // 3, idx % 3
+        if e in elements:
+            np.testing.assert_allclose(rfield[i, j], field[i, j])
+        else:
+            assert np.isnan(rfield[i, j]).all()
+
+
+@pytest.mark.parametrize("threeColumn", [False, True])
+def test_scalar_roundtrip(tmp_path, tensor, threeColumn):
+    """Tests writing and reading scalar fields."""
+    freqs, field = tensor
+    fname = str(tmp_path / "EPSILON_TDDFT.OUT")
+    io.writeScalar(fname, freqs, field[0, 0], threeColumn, prec=16)
+    rfreqs, rfield = io.readScalar(fname)
+    np.testing.assert_allclose(rfreqs, freqs)
+    np.testing.assert_allclose(rfield, field[0, 0])
+
+
+def test_tensor_single_parse(tmp_path, tensor, monkeypatch):
+    """Tests that each tensor element file is parsed exactly once."""
+    freqs, field = tensor
+    dummy = str(tmp_path / "EPSILON_ij.OUT")
+    io.writeTensor(dummy, freqs, field, [11, 22, 33])
+    parsed = []
+    loadData = io.loadData
+
+    def countingLoadData(fname, *args, **kwargs):
+        data = loadData(fname, *args, **kwargs)
+        parsed.append(fname)
+        return data
+
+    monkeypatch.setattr(io, "loadData", countingLoadData)
+    io.readTensor(dummy)
+    assert len(parsed) == 3
+    assert len(set(parsed)) == 3
+
+
+def test_parser_elk_format(tmp_path):
+    """Tests parsing Elk style data with Fortran peculiarities."""
+    fname = tmp_path / "EELS_TDDFT.OUT"
+    fname.write_text(
+        "# comment line\n"
+        "  0.1000000000E-01  1.000000000     \n"
+        "  0.2000000000E-01 ******************\n"
+        "  0.3000000000E-01  3.0D+00 # inline\n"
+        "     \n"
+        "  0.1000000000E-01 -0.5000000000E-01\n"
+        "  0.2000000000E-01  0.0000000000    \n"
+        "  0.3000000000E-01  2.000000000     \n"
+    )
+    data = io.loadData(str(fname))
+    assert data.shape == (6, 2)
+    assert np.isnan(data[1, 1])
+    assert data[2, 1] == 3.0
+    np.testing.assert_array_equal(data[3:, 0], data[:3, 0])
+
+
+def test_parser_fallback(tmp_path):
+    """Tests that invalid files raise ValueError, also after retrying."""
+    fname = tmp_path / "invalid.dat"
+    fname.write_text("1.0 2.0\n3.0 abc\n")
+    with pytest.raises(ValueError):
+        io.loadData(str(fname))
+    with pytest.raises(io.InvalidDataFileError):
+        io.readScalar(str(fname))
+
+
+def test_parser_concurrent_errors(tmp_path):
+    """Tests that invalid rows are detected when parsing in threads."""
+    good, bad = tmp_path / "good.dat", tmp_path / "bad.dat"
+    good.write_text("1.0 2.0\n" * 100)
+    bad.write_text("1.0 2.0\n" * 50 + "abc def\n" + "1.0 2.0\n" * 50)
+
+    def parse(fname):
+        try:
+            return io.loadData(str(fname)).shape
+        except ValueError:
+            return None
+
+    results = io.mapConcurrently(parse, [good, bad] * 100, workers=8)
+    assert results == [(100, 2), None] * 100
+
+
+@pytest.fixture
+def dataCache(tmp_path):
+    """Enables global data cache in temporary directory for one test."""
+    yield cache.enable(str(tmp_path / "cache"), maxSize=1)
+    cache.disable()
+
+
+def test_cache(tmp_path, tensor, dataCache):
+    """Tests cache hits, invalidation on rewrite and LRU eviction."""
+    freqs, field = tensor
+    fname = str(tmp_path / "EELS_TDDFT.OUT")
+    io.writeScalar(fname, freqs, field[0, 0])
+    first = io.readScalar(fname)
+    assert len(dataCache.entries()) == 1
+    second = io.readScalar(fname)
+    np.testing.assert_array_equal(first[1], second[1])
+    assert len(dataCache.entries()) == 1
+    # different reader options must not share entries
+    io.readScalar(fname, hartree=False)
+    assert len(dataCache.entries()) == 2
+    # rewritten file must not be served from cache
+    io.writeScalar(fname, freqs, 2 * field[0, 0])
+    third = io.readScalar(fname)
+    np.testing.assert_allclose(third[1], 2 * first[1])
+    # keep only most recently used entry when limit fits exactly one
+    entries = sorted(dataCache.entries())
+    for age, (_, _, path) in enumerate(reversed(entries)):
+        os.utime(path, (1000 - age, 1000 - age))
+    dataCache.load(os.path.basename(entries[0][2])[:-4])
+    dataCache.maxSize = max(e[1] for e in entries) / 1024**2
+    dataCache.evict()
+    assert [e[2] for e in dataCache.entries()] == [entries[0][2]]
+
+
+@pytest.mark.parametrize("threeColumn", [False, True])
+def test_chunks_scalar(tmp_path, tensor, threeColumn):
+    """Tests that chunked reading and writing equals whole-file versions."""
+    freqs, field = tensor
+    fname = str(tmp_path / "EPSILON_TDDFT.OUT")
+    io.writeScalar(fname, freqs, field[0, 0], threeColumn, prec=16)
+    chunks = list(io.iterScalar(fname, chunkSize=7))
+    assert max(len(c[0]) for c in chunks) == 7
+    rfreqs, rfield = io.readScalar(fname)
+    np.testing.assert_array_equal(
+        np.concatenate([c[0] for c in chunks]), rfreqs
+    )
+    np.testing.assert_array_equal(
+        np.concatenate([c[1] for c in chunks]), rfield
+    )
+    # chunked writer must produce identical files
+    cname = str(tmp_path / "chunked.OUT")
+    io.writeScalarChunks(cname, iter(chunks), threeColumn, prec=16)
+    with open(fname, "rb") as f1, open(cname, "rb") as f2:
+        assert f1.read() == f2.read()
+
+
+def test_chunks_tensor(tmp_path, tensor):
+    """Tests chunked tensor reading with missing elements and writing."""
+    freqs, field = tensor
+    dummy = str(tmp_path / "EPSILON_ij.OUT")
+    io.writeTensor(dummy, freqs, field, [11, 23, 33])
+    rfreqs, rfield = io.readTensor(dummy)
+    chunks = list(io.iterTensor(dummy, chunkSize=16))
+    np.testing.assert_array_equal(
+        np.concatenate([c[0] for c in chunks]), rfreqs
+    )
+    ten = np.concatenate([c[1] for c in chunks], axis=2)
+    assert ten.tobytes() == rfield.tobytes()
+    cdummy = str(tmp_path / "chunked_ij.OUT")
+    io.writeTensorChunks(cdummy, chunks, [11, 23])
+    for e in ["11", "23"]:
+        with open(dummy.replace("ij", e), "rb") as f1:
+            with open(cdummy.replace("ij", e), "rb") as f2:
+                assert f1.read() == f2.read()
+    with pytest.raises(io.TensorNotFoundError):
+        next(io.iterTensor(str(tmp_path / "MISSING_ij.OUT")))
+
+
+@pytest.mark.parametrize("threeColumn", [False, True])
+def test_window(tmp_path, tensor, threeColumn):
+    """Tests that restricted loading keeps exactly the rows in the window."""
+    freqs, field = tensor
+    dummy = str(tmp_path / "EPSILON_ij.OUT")
+    io.writeTensor(dummy, freqs, field, [11, 22], threeColumn, prec=16)
+    wrange = (2.0, 5.0)
+    fullFreqs, fullField = io.readTensor(dummy)
+    window = (fullFreqs >= wrange[0]) & (fullFreqs <= wrange[1])
+    rfreqs, rfield = io.readTensor(dummy, wrange=wrange)
+    np.testing.assert_array_equal(rfreqs, fullFreqs[window])
+    assert rfield.tobytes() == fullField[:, :, window].tobytes()
+    fname = dummy.replace("ij", "11")
+    rfreqs, rfield = io.readScalar(fname, wrange=wrange)
+    np.testing.assert_array_equal(rfield, fullField[0, 0, window])
+    # windows beyond the grid are empty
+    rfreqs, rfield = io.readWindow(fname, (1e3, 2e3))
+    assert rfreqs.size == rfield.size == 0
+
+
+@pytest.mark.parametrize("ext", [".gz", ".bz2", ".xz"])
+@pytest.mark.parametrize("threeColumn", [False, True])
+def test_compressed(tmp_path, tensor, ext, threeColumn):
+    """Tests that compressed files are written and found transparently."""
+    freqs, field = tensor
+    dummy = str(tmp_path / "EPSILON_ij.OUT")
+    io.writeTensor(dummy + ext, freqs, field, [11, 33], threeColumn, prec=16)
+    assert not os.path.exists(dummy.replace("ij", "11"))
+    # plain name resolves to compressed files
+    rfreqs, rfield = io.readTensor(dummy)
+    np.testing.assert_allclose(rfreqs, freqs)
+    np.testing.assert_allclose(rfield[2, 2], field[2, 2])
+    fname = dummy.replace("ij", "11")
+    chunks = list(io.iterScalar(fname, chunkSize=16))
+    values = np.concatenate([c[1] for c in chunks])
+    np.testing.assert_allclose(values, field[0, 0])
+    np.testing.assert_allclose(
+        io.loadData(fname)[:, 0], np.loadtxt(fname + ext)[:, 0]
+    )
+
+
+def test_matrix(tmp_path, tensor, dataCache):
+    """Tests reading 4x4 response matrices with indices starting at 0."""
+    freqs, field = tensor
+    dummy = str(tmp_path / "CHI_ij.OUT")
+    io.writeScalar(dummy.replace("ij", "00"), freqs, field[0, 0], prec=16)
+    io.writeTensor(dummy, freqs, field, [11, 22, 33], prec=16)
+    rfreqs, chi = io.readMatrix(dummy)
+    assert chi.shape == (4, 4, len(freqs))
+    np.testing.assert_allclose(chi[0, 0], field[0, 0])
+    assert np.isnan(chi[0, 1:]).all() and np.isnan(chi[1:, 0]).all()
+    # magnetization block equals tensor read the usual way
+    _, ten = io.readTensor(dummy)
+    assert chi[1:, 1:].tobytes() == ten.tobytes()
+    # shape is part of the cache key and selects the dependencies
+    _, sub = io.readMatrix(dummy, shape=(2, 2))
+    assert sub.shape == (2, 2, len(freqs))
+    assert len(dataCache.entries()) == 3
+
+
+def test_shared(tmp_path, tensor):
+    """Tests that files with identical content share read-only arrays."""
+    freqs, field = tensor
+    dummies = []
+    for folder in ["a", "b", "c"]:
+        (tmp_path / folder).mkdir()
+        dummies.append(str(tmp_path / folder / "SIGMA_ij.OUT"))
+        io.writeTensor(dummies[-1], freqs, field, [11, 22, 33])
+    # same content in another folder, but different in last one
+    io.writeScalar(dummies[2].replace("ij", "33"), freqs, 2 * field[2, 2])
+    first = io.readTensor(dummies[0])
+    second = io.readTensor(dummies[1])
+    assert first[1] is second[1] and first[0] is second[0]
+    assert not first[1].flags.writeable
+    with pytest.raises(ValueError):
+        first[1][0, 0, 0] = 0
+    third = io.readTensor(dummies[2])
+    assert third[1] is not first[1]
+    # different reader options must not share arrays
+    assert io.readTensor(dummies[0], hartree=False)[0] is not first[0]
+    assert io.contentHash(dummies[0]) is None
+    fname = dummies[0].replace("ij", "11")
+    assert io.contentHash(fname) == io.contentHash(
+        dummies[1].replace("ij", "11")
+    )
+
+
+def test_shared_no_rehash(tmp_path, tensor, monkeypatch, dataCache):
+    """Tests that files are hashed only after parsing, not on cache hits."""
+    freqs, field = tensor
+    dummy = str(tmp_path / "SIGMA_ij.OUT")
+    io.writeTensor(dummy, freqs, field, [11, 22])
+    hashed = []
+    contentHash = io.contentHash
+
+    def countingContentHash(fname, *args, **kwargs):
+        hashed.append(fname)
+        return contentHash(fname, *args, **kwargs)
+
+    monkeypatch.setattr(io, "contentHash", countingContentHash)
+    first = io.readTensor(dummy)
+    assert len(hashed) == 2
+    # unchanged files are found by their state while shared
+    assert io.readTensor(dummy)[1] is first[1]
+    # hits of the data cache are not hashed either
+    del first
+    io._contentHashes.clear()
+    io.readTensor(dummy)
+    assert len(hashed) == 2
+
+
+def test_manifest(tmp_path, tensor, monkeypatch):
+    """Tests that missing files are detected without touching the disk."""
+    freqs, field = tensor
+    dummy = str(tmp_path / "EPSILON_ij.OUT")
+    io.writeTensor(dummy, freqs, field, [11, 33])
+    io.writeScalar(str(tmp_path / "EELS_TDDFT.OUT.gz"), freqs, field[0, 0])
+    manifest = io.Manifest(str(tmp_path))
+    assert manifest.hasOutput(dummy)
+    assert manifest.hasOutput(str(tmp_path / "EELS_TDDFT.OUT"))
+    assert not manifest.hasOutput(str(tmp_path / "SIGMA_ij.OUT"))
+    assert not manifest.hasOutput(str(tmp_path / "EPSILON_TDDFT_ij.OUT"))
+    # files outside of listed folder are not covered
+    assert manifest.hasOutput("/nonexistent/SIGMA_ij.OUT")
+    # only the two existing element files may be loaded
+    opened = []
+    loadData = io.loadData
+
+    def countingLoadData(fname, *args, **kwargs):
+        opened.append(fname)
+        return loadData(fname, *args, **kwargs)
+
+    monkeypatch.setattr(io, "loadData", countingLoadData)
+    rfreqs, rfield = io.readTensor(dummy, manifest=manifest)
+    assert sorted(opened) == [dummy.replace("ij", e) for e in ["11", "33"]]
+    assert np.isnan(rfield[0, 1]).all()
+    np.testing.assert_allclose(rfield[2, 2], field[2, 2], rtol=1e-6)
+    with pytest.raises(FileNotFoundError):
+        io.readScalar(str(tmp_path / "MISSING.OUT"), manifest=manifest)
+
+
+@pytest.mark.parametrize("csv", [False, True])
+def test_columns(tmp_path, tensor, csv):
+    """Tests reading several series from selected columns of a wide table."""
+    freqs, field = tensor
+    data = np.column_stack(
+        [freqs]
+        + [f(field[i, i]) for i in range(3) for f in (np.real, np.imag)]
+    )
+    names = ["w", "xx_re", "xx_im", "yy_re", "yy_im", "zz_re", "zz_im"]
+    fname = str(tmp_path / "reference.dat")
+    if csv:
+        np.savetxt(
+            fname, data, delimiter=",", header=",".join(names), comments=""
+        )
+    else:
+        np.savetxt(fname, data, header=" ".join(names))
+    assert io.readTableHeader(fname) == (names, "," if csv else None, 1)
+    freqColumn, series = io.parseColumnMap("w; yy_re, yy_im; zz: 5; 1, 2")
+    rfreqs, fields = io.readColumns(fname, series, freqColumn, hartree=False)
+    np.testing.assert_allclose(rfreqs, freqs)
+    assert [label for label, _ in fields] == ["yy_re", "zz", "xx_re"]
+    np.testing.assert_allclose(fields[0][1], field[1, 1])
+    np.testing.assert_allclose(fields[1][1], field[2, 2].real)
+    np.testing.assert_allclose(fields[2][1], field[0, 0])
+    with pytest.raises(ValueError):
+        io.readColumns(fname, [(None, "missing", None)])
+    with pytest.raises(ValueError):
+        io.parseColumnMap("0")
+
+
+@pytest.mark.parametrize("threeColumn", [False, True])
+def test_savetxt_identical(tmp_path, threeColumn):
+    """Tests that the bulk writer output equals np.savetxt byte by byte."""
+    array = np.random.randn(70000, 3 if threeColumn else 2) * 1e5
+    array[:3, 1] = [np.nan, -0.0, np.inf]
+    fmt, header = io._scalarFormat(threeColumn, 6)
+    fast, ref = str(tmp_path / "fast.dat"), str(tmp_path / "ref.dat")
+    with open(fast, "wb") as f:
+        io.savetxt(f, array, fmt, header)
+        io.savetxt(f, array[:0], fmt)
+    with open(ref, "wb") as f:
+        np.savetxt(f, array, fmt=fmt, header=header)
+    with open(fast, "rb") as f1, open(ref, "rb") as f2:
+        assert f1.read() == f2.read()
+
+
+def test_parallel_write(tmp_path, tensor):
+    """Tests concurrent element writes against serial ones and errors."""
+    freqs, field = tensor
+    serial = io.writeTensor(
+        str(tmp_path / "A_ij.OUT"), freqs, field, workers=1
+    )
+    written = io.writeTensor(str(tmp_path / "B_ij.OUT"), freqs, field)
+    assert written == [f.replace("A_", "B_") for f in serial]
+    for fa, fb in zip(serial, written):
+        with open(fa, "rb") as f1, open(fb, "rb") as f2:
+            assert f1.read() == f2.read()
+    # a folder in place of one element file fails only this element
+    (tmp_path / "C_2.OUT").mkdir()
+    with pytest.raises(io.WriteError) as e:
+        io.writeVector(str(tmp_path / "C_i.OUT"), freqs, field)
+    assert list(e.value.errors) == [str(tmp_path / "C_2.OUT")]
+    assert e.value.written == [
+        str(tmp_path / f) for f in ["C_1.OUT", "C_3.OUT"]
+    ]
+
+
+# EOF - test_io.py
@@ -0,0 +1,71 @@
+import gc
+
+import numpy as np
+import pytest
+
+from elkoa.utils import io, parallel
+
+
+@pytest.fixture
+def scalarFiles(tmp_path):
+    """Writes a few scalar output files with distinct data."""
+    freqs = np.linspace(0, 10, 50)
+    filenames = []
+    for idx in range(4):
+        filename = str(tmp_path / "EELS_{}.OUT".format(idx))
+        io.writeScalar(filename, freqs, freqs * idx + 1j)
+        filenames.append(filename)
+    return filenames
+
+
+def test_read_files(scalarFiles):
+    """Tests that worker processes return the same data in input order."""
+    results = parallel.readFiles(scalarFiles, io.readScalar, processes=2)
+    assert len(results) == len(scalarFiles)
+    for filename, (freqs, field) in zip(scalarFiles, results):
+        refFreqs, refField = io.readScalar(filename)
+        np.testing.assert_array_equal(freqs, refFreqs)
+        np.testing.assert_array_equal(field, refField)
+        # results are shared with reads in this process
+        assert field is refField
+    # identical grids are interned
+    assert results[0][0] is results[-1][0]
+    # shared memory is closed once results are gone
+    del results, freqs, field, refFreqs, refField
+    gc.collect()
+    parallel._closeReleased()
+    assert not parallel._attached
+
+
+def test_read_files_duplicates(scalarFiles, tmp_path):
+    """Tests that files with identical content are parsed only once."""
+    copies = []
+    for idx, filename in enumerate(scalarFiles[:2]):
+        copy = tmp_path / "copy{}".format(idx)
+        copy.mkdir()
+        copies.append(str(copy / "EELS_0.OUT"))
+        with open(filename, "rb") as src:
+            (copy / "EELS_0.OUT").write_bytes(src.read())
+    results = parallel.readFiles(scalarFiles[:2] + copies, processes=2)
+    assert results[0][1] is results[2][1]
+    assert results[1][1] is results[3][1]
+    assert results[0][1] is not results[1][1]
+    assert not results[0][1].flags.writeable
+
+
+def test_read_files_errors(scalarFiles, tmp_path):
+    """Tests raising and returning reader errors in and out of process."""
+    filenames = scalarFiles + [str(tmp_path / "missing.OUT")]
+    for processes in (1, 2):
+        results = parallel.readFiles(
+            filenames, processes=processes, returnExceptions=True
+        )
+        assert isinstance(results[-1], OSError)
+        np.testing.assert_array_equal(results[0][1].real, 0)
+        with pytest.raises(OSError):
+            parallel.readFiles(filenames, processes=processes)
+    with pytest.raises(ValueError):
+        parallel.readFiles(filenames, np.loadtxt)
+
+
+# EOF - test_parallel.py
@@ -0,0 +1,77 @@
+import os
+import types
+
+import numpy as np
+import pytest
+
+from elkoa.utils import compact, grids, io, session
+
+
+def makeTab(freqs, field, label, **kwargs):
+    """Creates minimal stand-in for TabData holding the stored attributes."""
+    attrs = dict(filename=None, notes=None, states=None, xshift=0)
+    attrs.update(kwargs, isVector=kwargs.get("isVector", False))
+    return types.SimpleNamespace(
+        freqs=freqs, field=field, label=label, **attrs
+    )
+
+
+@pytest.fixture
+def tasks():
+    """Creates tasks with tensor, converted vector and batch tabs."""
+    freqs = grids.intern(np.linspace(0, 10, 200))
+    ten = np.random.randn(3, 3, 200) + np.random.randn(3, 3, 200) * 1j
+    vec = compact.CompactField.diagonal(ten[[0, 1, 2], [0, 1, 2]])
+    return {
+        "121": [
+            makeTab(freqs, ten, "eps", filename="EPSILON_ij.OUT"),
+            makeTab(None, None, "sigma", filename="SIGMA_ij.OUT"),
+            makeTab(freqs, vec, "n", notes="121", isVector=True, xshift=0.5),
+        ],
+        "batch #1": [
+            makeTab(freqs, ten[0, 0], "loss", notes=["swidth", str(idx)])
+            for idx in range(3)
+        ],
+    }
+
+
+def test_session_roundtrip(tmp_path, tasks):
+    """Tests that arrays and metadata are restored as stored."""
+    fname = str(tmp_path / "session.npz")
+    tabNames = {"121": ["eps", "sigma", "n[c]"], "batch #1": ["EELS.OUT"]}
+    titles = {"batch #1": "batch #1 - swidth"}
+    session.save(fname, tasks, tabNames, titles)
+    restored, rTabNames, rTitles = session.load(fname)
+    assert list(restored) == list(tasks)
+    assert rTabNames == tabNames
+    assert rTitles == {"121": "121", "batch #1": "batch #1 - swidth"}
+    for task, tabs in tasks.items():
+        for tab, rtab in zip(tabs, restored[task]):
+            for attr in session.TAB_ATTRIBUTES:
+                assert rtab[attr] == getattr(tab, attr)
+            if tab.field is None:
+                assert rtab["field"] is None and rtab["freqs"] is None
+                continue
+            np.testing.assert_array_equal(rtab["freqs"], tab.freqs)
+            np.testing.assert_array_equal(
+                np.asarray(rtab["field"]), np.asarray(tab.field)
+            )
+    # compact fields stay compact and grids are stored and restored once
+    assert isinstance(restored["121"][2]["field"], compact.CompactField)
+    assert restored["121"][0]["freqs"] is restored["batch #1"][2]["freqs"]
+
+
+def test_session_smaller_than_text(tmp_path, tasks):
+    """Tests that the binary container beats the text files in size."""
+    tab = tasks["121"][0]
+    fname = str(tmp_path / "session.npz")
+    session.save(fname, {"121": [tab]}, {"121": ["eps"]})
+    files = io.writeTensor(str(tmp_path / "EPS_ij.OUT"), tab.freqs, tab.field)
+    textSize = sum(os.path.getsize(f) for f in files)
+    assert os.path.getsize(fname) < textSize / 3
+    with pytest.raises(ValueError):
+        np.savez(str(tmp_path / "other.npz"), a=np.zeros(3))
+        session.load(str(tmp_path / "other.npz"))
+
+
+# EOF - test_session.py
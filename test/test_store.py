@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from elkoa.utils import convert, store
+
+
+@pytest.fixture
+def fieldStore(tmp_path):
+    """Creates field store mapping every field in a temporary directory."""
+    fs = store.FieldStore(str(tmp_path), minSize=0)
+    yield fs
+    fs.close()
+
+
+def test_store_copy_on_write(fieldStore):
+    """Tests that mapped fields equal input and are modified only in RAM."""
+    field = np.random.randn(3, 3, 100) + np.random.randn(3, 3, 100) * 1j
+    mapped = fieldStore.put(field)
+    assert isinstance(mapped, np.memmap)
+    np.testing.assert_array_equal(mapped, field)
+    mapped[0, 0, :] = 0
+    again = np.load(mapped.filename, mmap_mode="r")
+    np.testing.assert_array_equal(again, field)
+    # already mapped fields and None are passed through
+    assert fieldStore.put(mapped) is mapped
+    assert fieldStore.put(None) is None
+
+
+def test_store_small_fields(tmp_path):
+    """Tests that fields below the size threshold stay in memory."""
+    fs = store.FieldStore(str(tmp_path))
+    field = np.zeros((3, 3, 10), dtype=complex)
+    assert fs.put(field) is field
+    fs.close()
+
+
+def test_converter_on_mapped_field(fieldStore):
+    """Tests that converters accept mapped fields and return plain arrays."""
+    freqs = np.linspace(0.1, 10, 100)
+    eps = np.random.randn(3, 3, 100) + np.random.randn(3, 3, 100) * 1j
+    converter = convert.Converter(
+        q=[0, 0, 0], B=np.identity(3), freqs=freqs, eta=0.01
+    )
+    sig = converter.eps_to_sig(fieldStore.put(eps))
+    assert type(sig) is np.ndarray
+    np.testing.assert_array_equal(sig, converter.eps_to_sig(eps))
+
+
+# EOF - test_store.py